@@ -1,5 +1,8 @@
 """Initial schema with all tables.
 
+Indexes are created in 002_initial_indexes so they can be built
+CONCURRENTLY outside of the migration transaction.
+
 Revision ID: 001_initial
 Revises:
 Create Date: 2025-01-29
@@ -32,7 +35,6 @@ def upgrade() -> None:
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_users_email', 'users', ['email'])
 
     # Rights holders table
     op.create_table(
@@ -44,7 +46,6 @@ def upgrade() -> None:
         sa.Column('contact_info', postgresql.JSONB(), nullable=True),
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_rights_holders_name_normalized', 'rights_holders', ['name_normalized'])
 
     # Territories table
     op.create_table(
@@ -74,8 +75,6 @@ def upgrade() -> None:
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_trademarks_name', 'trademarks', ['name'])
-    op.create_index('ix_trademarks_rights_holder_id', 'trademarks', ['rights_holder_id'])
 
     # Trademark classes table
     op.create_table(
@@ -88,9 +87,6 @@ def upgrade() -> None:
         sa.UniqueConstraint('trademark_id', 'icgs_class', name='uq_trademark_class'),
         sa.CheckConstraint('icgs_class >= 1 AND icgs_class <= 45', name='ck_icgs_class_range'),
     )
-    op.create_index('ix_trademark_classes_trademark_id', 'trademark_classes', ['trademark_id'])
-    op.create_index('ix_trademark_classes_icgs_class', 'trademark_classes', ['icgs_class'])
-    op.create_index('ix_trademark_classes_product_group', 'trademark_classes', ['product_group'])
 
     # Trademark registrations table
     op.create_table(
@@ -124,12 +120,6 @@ def upgrade() -> None:
         sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.UniqueConstraint('trademark_id', 'territory_id', 'application_number', name='uq_trademark_territory_application'),
     )
-    op.create_index('ix_trademark_registrations_trademark_id', 'trademark_registrations', ['trademark_id'])
-    op.create_index('ix_trademark_registrations_territory_id', 'trademark_registrations', ['territory_id'])
-    op.create_index('ix_trademark_registrations_registration_number', 'trademark_registrations', ['registration_number'])
-    op.create_index('idx_registrations_expiration', 'trademark_registrations', ['expiration_date'])
-    op.create_index('idx_registrations_status', 'trademark_registrations', ['status'])
-    op.create_index('idx_registrations_renewal_status', 'trademark_registrations', ['renewal_status'])
 
     # Renewal actions table
     op.create_table(
@@ -144,7 +134,6 @@ def upgrade() -> None:
         sa.Column('created_by', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=True),
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_renewal_actions_registration_id', 'renewal_actions', ['registration_id'])
 
     # Documents table
     op.create_table(
@@ -163,9 +152,6 @@ def upgrade() -> None:
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.CheckConstraint('registration_id IS NOT NULL OR trademark_id IS NOT NULL', name='ck_document_parent'),
     )
-    op.create_index('ix_documents_registration_id', 'documents', ['registration_id'])
-    op.create_index('ix_documents_trademark_id', 'documents', ['trademark_id'])
-    op.create_index('ix_documents_document_type', 'documents', ['document_type'])
 
     # Notifications table
     op.create_table(
@@ -185,8 +171,6 @@ def upgrade() -> None:
         sa.Column('suppressed_reason', sa.String(100), nullable=True),
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_notifications_registration_id', 'notifications', ['registration_id'])
-    op.create_index('ix_notifications_scheduled_send_date', 'notifications', ['scheduled_send_date'])
 
     # Sync logs table
     op.create_table(
@@ -202,10 +186,6 @@ def upgrade() -> None:
         sa.Column('duration_ms', sa.Integer(), nullable=True),
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_sync_logs_registration_id', 'sync_logs', ['registration_id'])
-    op.create_index('ix_sync_logs_source', 'sync_logs', ['source'])
-    op.create_index('ix_sync_logs_status', 'sync_logs', ['status'])
-    op.create_index('ix_sync_logs_created_at', 'sync_logs', ['created_at'])
 
     # Fee schedules table
     op.create_table(
@@ -222,7 +202,6 @@ def upgrade() -> None:
         sa.Column('notes', sa.Text(), nullable=True),
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_fee_schedules_territory_id', 'fee_schedules', ['territory_id'])
 
     # Consent letters table
     op.create_table(
@@ -253,7 +232,6 @@ def upgrade() -> None:
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
         sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_consent_letters_rights_holder_id', 'consent_letters', ['rights_holder_id'])
 
     # Audit log table
     op.create_table(
@@ -269,8 +247,6 @@ def upgrade() -> None:
         sa.Column('user_agent', sa.Text(), nullable=True),
         sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
     )
-    op.create_index('ix_audit_log_user_id', 'audit_log', ['user_id'])
-    op.create_index('ix_audit_log_entity_id', 'audit_log', ['entity_id'])
 
 
 def downgrade() -> None:
@@ -0,0 +1,111 @@
+"""Indexes for the initial schema, built concurrently.
+
+CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so every
+statement runs in an autocommit block. IF NOT EXISTS keeps the revision
+safe for databases that already got these indexes from 001_initial.
+
+Revision ID: 002_initial_indexes
+Revises: 001_initial
+Create Date: 2025-02-03
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '002_initial_indexes'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_rights_holders_name_normalized', 'rights_holders', ['name_normalized'], {}),
+    ('ix_trademarks_name', 'trademarks', ['name'], {}),
+    ('ix_trademarks_rights_holder_id', 'trademarks', ['rights_holder_id'], {}),
+    ('ix_trademark_classes_icgs_class', 'trademark_classes', ['icgs_class'], {}),
+    ('ix_trademark_classes_product_group', 'trademark_classes', ['product_group'], {}),
+    ('ix_trademark_registrations_territory_id', 'trademark_registrations', ['territory_id'], {}),
+    ('ix_trademark_registrations_registration_number', 'trademark_registrations', ['registration_number'], {}),
+    ('idx_registrations_expiration', 'trademark_registrations', ['expiration_date'], {}),
+    ('idx_registrations_status', 'trademark_registrations', ['status'], {}),
+    ('idx_registrations_renewal_status', 'trademark_registrations', ['renewal_status'], {}),
+    ('ix_renewal_actions_registration_id', 'renewal_actions', ['registration_id'], {}),
+    (
+        'ix_renewal_actions_action_date_brin',
+        'renewal_actions',
+        ['action_date'],
+        {'postgresql_using': 'brin', 'postgresql_with': {'pages_per_range': 32}},
+    ),
+    ('ix_documents_registration_id', 'documents', ['registration_id'], {}),
+    ('ix_documents_trademark_id', 'documents', ['trademark_id'], {}),
+    ('ix_documents_document_type', 'documents', ['document_type'], {}),
+    ('ix_notifications_registration_id', 'notifications', ['registration_id'], {}),
+    ('ix_notifications_scheduled_send_date', 'notifications', ['scheduled_send_date'], {}),
+    ('ix_sync_logs_registration_id', 'sync_logs', ['registration_id'], {}),
+    ('ix_sync_logs_source', 'sync_logs', ['source'], {}),
+    ('ix_sync_logs_status', 'sync_logs', ['status'], {}),
+    # Append-only, insert-ordered tables: BRIN is a few pages instead of a
+    # btree the size of the column, and still prunes time-range scans.
+    (
+        'ix_sync_logs_created_at_brin',
+        'sync_logs',
+        ['created_at'],
+        {'postgresql_using': 'brin', 'postgresql_with': {'pages_per_range': 32}},
+    ),
+    ('ix_fee_schedules_territory_id', 'fee_schedules', ['territory_id'], {}),
+    ('ix_consent_letters_rights_holder_id', 'consent_letters', ['rights_holder_id'], {}),
+    ('ix_audit_log_user_id', 'audit_log', ['user_id'], {}),
+    ('ix_audit_log_entity_id', 'audit_log', ['entity_id'], {}),
+    (
+        'ix_audit_log_created_at_brin',
+        'audit_log',
+        ['created_at'],
+        {'postgresql_using': 'brin', 'postgresql_with': {'pages_per_range': 32}},
+    ),
+]
+
+# Indexes created by earlier versions of 001_initial that duplicate another
+# index and are dropped if present: (index name, table)
+SUPERSEDED_INDEXES = [
+    # users.email is already covered by the users_email_key unique constraint
+    ('ix_users_email', 'users'),
+    # btree replaced by ix_sync_logs_created_at_brin
+    ('ix_sync_logs_created_at', 'sync_logs'),
+    # leading column of uq_trademark_class (trademark_id, icgs_class)
+    ('ix_trademark_classes_trademark_id', 'trademark_classes'),
+    # leading column of uq_trademark_territory_application
+    ('ix_trademark_registrations_trademark_id', 'trademark_registrations'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **kwargs,
+            )
+        for name, table in SUPERSEDED_INDEXES:
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _kwargs in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,55 @@
+"""Partial composite indexes for the hot registration/notification filters.
+
+Revision ID: 003_partial_composite_indexes
+Revises: 002_initial_indexes
+Create Date: 2025-02-05
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '003_partial_composite_indexes'
+down_revision: Union[str, None] = '002_initial_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Territory dashboards and renewal reminders only look at active
+        # registrations, filtered by territory/status and ordered by expiry.
+        op.create_index(
+            'ix_reg_territory_status_exp',
+            'trademark_registrations',
+            ['territory_id', 'status', 'expiration_date'],
+            postgresql_where=sa.text("renewal_status = 'active'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Notification dispatcher: pending, non-suppressed notifications by date
+        op.create_index(
+            'ix_notifications_pending',
+            'notifications',
+            ['scheduled_send_date'],
+            postgresql_where=sa.text('is_suppressed = false AND email_sent_at IS NULL'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_notifications_pending',
+            table_name='notifications',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_reg_territory_status_exp',
+            table_name='trademark_registrations',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,128 @@
+"""Partition audit_log by month on created_at.
+
+audit_log is append-only and only ever read by time range, so monthly
+RANGE partitions keep each index small, let queries prune to the months
+they touch, and make retention a DROP TABLE of an old partition instead
+of a bulk DELETE. Rows outside the pre-created months land in
+audit_log_default; audit_log_ensure_partitions() is called by the
+maintenance Celery task to keep future months created ahead of time.
+
+Revision ID: 004_partition_audit_log
+Revises: 003_partial_composite_indexes
+Create Date: 2025-02-10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '004_partition_audit_log'
+down_revision: Union[str, None] = '003_partial_composite_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    'id, user_id, action, entity_type, entity_id, old_values, new_values, '
+    'ip_address, user_agent, created_at'
+)
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE audit_log RENAME TO audit_log_legacy')
+    op.execute('ALTER TABLE audit_log_legacy RENAME CONSTRAINT audit_log_pkey TO audit_log_legacy_pkey')
+
+    # The partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE audit_log (
+            id UUID NOT NULL,
+            user_id UUID REFERENCES users (id),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50),
+            entity_id UUID,
+            old_values JSONB,
+            new_values JSONB,
+            ip_address INET,
+            user_agent TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT')
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION audit_log_ensure_partitions(
+            from_month DATE,
+            months_ahead INTEGER
+        ) RETURNS VOID AS $$
+        DECLARE
+            month_start DATE := date_trunc('month', from_month)::date;
+            last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_log FOR VALUES FROM (%L) TO (%L)',
+                    'audit_log_' || to_char(month_start, 'YYYY_MM'),
+                    month_start,
+                    (month_start + INTERVAL '1 month')::date
+                );
+                month_start := (month_start + INTERVAL '1 month')::date;
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        SELECT audit_log_ensure_partitions(
+            LEAST(
+                COALESCE((SELECT min(created_at) FROM audit_log_legacy), now()),
+                now()
+            )::date,
+            3
+        )
+    """)
+
+    op.execute(f'INSERT INTO audit_log ({COLUMNS}) SELECT {COLUMNS} FROM audit_log_legacy')
+    op.execute('DROP TABLE audit_log_legacy')
+
+    # Partitioned indexes cascade to every partition, current and future.
+    # CONCURRENTLY is not supported on partitioned tables.
+    op.create_index('ix_audit_log_user_id', 'audit_log', ['user_id'])
+    op.create_index('ix_audit_log_entity_id', 'audit_log', ['entity_id'])
+    op.create_index(
+        'ix_audit_log_created_at_brin',
+        'audit_log',
+        ['created_at'],
+        postgresql_using='brin',
+        postgresql_with={'pages_per_range': 32},
+    )
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE audit_log RENAME TO audit_log_partitioned')
+    op.execute('ALTER TABLE audit_log_partitioned RENAME CONSTRAINT audit_log_pkey TO audit_log_partitioned_pkey')
+    op.execute("""
+        CREATE TABLE audit_log (
+            id UUID PRIMARY KEY,
+            user_id UUID REFERENCES users (id),
+            action VARCHAR(50) NOT NULL,
+            entity_type VARCHAR(50),
+            entity_id UUID,
+            old_values JSONB,
+            new_values JSONB,
+            ip_address INET,
+            user_agent TEXT,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute(f'INSERT INTO audit_log ({COLUMNS}) SELECT {COLUMNS} FROM audit_log_partitioned')
+    op.execute('DROP TABLE audit_log_partitioned CASCADE')
+    op.execute('DROP FUNCTION IF EXISTS audit_log_ensure_partitions(DATE, INTEGER)')
+
+    op.create_index('ix_audit_log_user_id', 'audit_log', ['user_id'])
+    op.create_index('ix_audit_log_entity_id', 'audit_log', ['entity_id'])
+    op.create_index(
+        'ix_audit_log_created_at_brin',
+        'audit_log',
+        ['created_at'],
+        postgresql_using='brin',
+        postgresql_with={'pages_per_range': 32},
+    )
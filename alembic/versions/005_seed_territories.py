@@ -0,0 +1,58 @@
+"""Seed the default territories.
+
+Only runs on an empty territories table, so databases seeded earlier by
+scripts/init_db.py or the deploy entry points are left untouched.
+
+Revision ID: 005_seed_territories
+Revises: 004_partition_audit_log
+Create Date: 2025-02-12
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.core.migrations import copy_seed
+
+revision: str = '005_seed_territories'
+down_revision: Union[str, None] = '004_partition_audit_log'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('name_en', 'name_ru', 'iso_code', 'region', 'fips_code', 'wipo_code', 'has_individual_fee')
+
+TERRITORIES = [
+    ('Russia', 'Россия', 'RU', 'Europe', 'RU', None, False),
+    ('European Union', 'Европейский Союз', 'EU', 'Europe', None, 'EM', False),
+    ('China', 'Китай', 'CN', 'Asia', None, 'CN', False),
+    ('United States', 'США', 'US', 'North America', None, 'US', False),
+    ('Japan', 'Япония', 'JP', 'Asia', None, 'JP', False),
+    ('South Korea', 'Южная Корея', 'KR', 'Asia', None, 'KR', False),
+    ('India', 'Индия', 'IN', 'Asia', None, 'IN', False),
+    ('Brazil', 'Бразилия', 'BR', 'South America', None, 'BR', False),
+    ('United Kingdom', 'Великобритания', 'GB', 'Europe', None, 'GB', False),
+    ('Germany', 'Германия', 'DE', 'Europe', None, 'DE', False),
+    ('France', 'Франция', 'FR', 'Europe', None, 'FR', False),
+    ('Italy', 'Италия', 'IT', 'Europe', None, 'IT', False),
+    ('Spain', 'Испания', 'ES', 'Europe', None, 'ES', False),
+    ('Canada', 'Канада', 'CA', 'North America', None, 'CA', False),
+    ('Australia', 'Австралия', 'AU', 'Oceania', None, 'AU', False),
+    ('WIPO (International)', 'ВОИС (Международная)', None, 'International', None, 'WO', False),
+]
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode():
+        has_territories = op.get_bind().execute(
+            sa.text('SELECT EXISTS (SELECT 1 FROM territories)')
+        ).scalar()
+        if has_territories:
+            return
+
+    copy_seed('territories', COLUMNS, TERRITORIES)
+
+
+def downgrade() -> None:
+    # Seeded rows may already be referenced by registrations; keep them.
+    pass
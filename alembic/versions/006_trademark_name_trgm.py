@@ -0,0 +1,50 @@
+"""Trigram indexes on trademark names.
+
+Serve the ILIKE '%...%' name search in the trademark list and similarity
+(%, <->) lookups, which a btree on name cannot.
+
+Revision ID: 006_trademark_name_trgm
+Revises: 005_seed_territories
+Create Date: 2025-02-14
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '006_trademark_name_trgm'
+down_revision: Union[str, None] = '005_seed_territories'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_trademarks_name_trgm', 'trademarks', 'name'),
+    ('ix_trademarks_name_transliterated_trgm', 'trademarks', 'name_transliterated'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _column in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,57 @@
+"""Normalized English territory name for exact, indexed lookups.
+
+Replaces ILIKE '%name%' territory matching in the importers, which could
+not use an index and matched wrong territories ("Russia" in "Belorussia").
+Backfill mirrors app.core.text.normalize_text: NFKC, collapsed whitespace,
+trimmed, lowercase.
+
+Revision ID: 007_territory_name_normalized
+Revises: 006_trademark_name_trgm
+Create Date: 2025-02-17
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '007_territory_name_normalized'
+down_revision: Union[str, None] = '006_trademark_name_trgm'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'territories',
+        sa.Column('name_normalized', sa.String(100), nullable=True),
+    )
+    op.execute(
+        r"""
+        UPDATE territories
+        SET name_normalized = lower(btrim(
+            regexp_replace(normalize(name_en, NFKC), '\s+', ' ', 'g')
+        ))
+        """
+    )
+    op.alter_column('territories', 'name_normalized', nullable=False)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_territories_name_normalized',
+            'territories',
+            ['name_normalized'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_territories_name_normalized',
+            table_name='territories',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('territories', 'name_normalized')
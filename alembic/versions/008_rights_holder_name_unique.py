@@ -0,0 +1,86 @@
+"""Unique normalized rights holder name.
+
+Lets importers get-or-create a rights holder with a single
+INSERT ... ON CONFLICT (name_normalized) ... RETURNING instead of
+SELECT-then-INSERT, which also raced on concurrent imports. Existing
+duplicates are merged into the oldest row first.
+
+Revision ID: 008_rights_holder_name_unique
+Revises: 007_territory_name_normalized
+Create Date: 2025-02-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '008_rights_holder_name_unique'
+down_revision: Union[str, None] = '007_territory_name_normalized'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_rights_holders_name_normalized'
+
+# Таблицы со ссылкой на rights_holders.id
+REFERENCING = [
+    ('trademarks', 'rights_holder_id'),
+    ('consent_letters', 'rights_holder_id'),
+]
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TEMP TABLE rights_holder_dupes ON COMMIT DROP AS
+        SELECT id, keep_id
+        FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY name_normalized ORDER BY created_at, id
+            ) AS keep_id
+            FROM rights_holders
+        ) ranked
+        WHERE id <> keep_id
+        """
+    )
+    for table, column in REFERENCING:
+        op.execute(
+            f"""
+            UPDATE {table} t SET {column} = d.keep_id
+            FROM rights_holder_dupes d
+            WHERE t.{column} = d.id
+            """
+        )
+    op.execute(
+        "DELETE FROM rights_holders r USING rights_holder_dupes d WHERE r.id = d.id"
+    )
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name='rights_holders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            INDEX_NAME,
+            'rights_holders',
+            ['name_normalized'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name='rights_holders',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            INDEX_NAME,
+            'rights_holders',
+            ['name_normalized'],
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,52 @@
+"""Trigram indexes for the consent letter search.
+
+list_consents matches ILIKE '%...%' against recipient names and the
+trademark name; GIN gin_trgm_ops lets those use an index for search
+strings of 3+ characters (shorter ones still scan, as before).
+
+Revision ID: 009_consent_search_trgm
+Revises: 008_rights_holder_name_unique
+Create Date: 2025-02-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '009_consent_search_trgm'
+down_revision: Union[str, None] = '008_rights_holder_name_unique'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_consent_letters_recipient_name_ru_trgm', 'consent_letters', 'recipient_name_ru'),
+    ('ix_consent_letters_recipient_name_en_trgm', 'consent_letters', 'recipient_name_en'),
+    ('ix_consent_letters_trademark_name_trgm', 'consent_letters', 'trademark_name'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _column in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,56 @@
+"""Composite covering index for the expiring-registrations query.
+
+list_expiring_registrations filters renewal_status = 'active' with an
+expiration_date range and orders by expiration_date; a btree on
+(renewal_status, expiration_date) serves both the range and the order
+without a sort. The single-column renewal_status index is a prefix of
+the new one and is dropped.
+
+Revision ID: 010_reg_active_expiration
+Revises: 009_consent_search_trgm
+Create Date: 2025-02-20
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '010_reg_active_expiration'
+down_revision: Union[str, None] = '009_consent_search_trgm'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_reg_active_expiration',
+            'trademark_registrations',
+            ['renewal_status', 'expiration_date'],
+            postgresql_include=['id', 'territory_id', 'trademark_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'idx_registrations_renewal_status',
+            table_name='trademark_registrations',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_registrations_renewal_status',
+            'trademark_registrations',
+            ['renewal_status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_reg_active_expiration',
+            table_name='trademark_registrations',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
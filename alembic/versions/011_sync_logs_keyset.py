@@ -0,0 +1,57 @@
+"""Btree on sync_logs (created_at, id) for keyset pagination.
+
+/sync/logs now pages with WHERE (created_at, id) < (:ts, :id) ORDER BY
+created_at DESC, id DESC; a btree on both columns serves that with a
+backward index scan at any page depth. BRIN cannot return ordered rows,
+and the new btree also covers created_at ranges, so the BRIN index is
+dropped.
+
+Revision ID: 011_sync_logs_keyset
+Revises: 010_reg_active_expiration
+Create Date: 2025-02-21
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '011_sync_logs_keyset'
+down_revision: Union[str, None] = '010_reg_active_expiration'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sync_logs_created_at_id',
+            'sync_logs',
+            ['created_at', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_sync_logs_created_at_brin',
+            table_name='sync_logs',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sync_logs_created_at_brin',
+            'sync_logs',
+            ['created_at'],
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_sync_logs_created_at_id',
+            table_name='sync_logs',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
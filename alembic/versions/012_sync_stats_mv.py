@@ -0,0 +1,42 @@
+"""Materialized view behind /sync/stats.
+
+Dashboards poll /sync/stats, whose counters change only when a sync
+runs; a one-row materialized view refreshed by the refresh_sync_stats
+Celery task replaces the full sync_logs aggregate with a single-row
+read. The unique index on id allows REFRESH ... CONCURRENTLY, so reads
+are never blocked by a refresh.
+
+Revision ID: 012_sync_stats_mv
+Revises: 011_sync_logs_keyset
+Create Date: 2025-02-22
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '012_sync_stats_mv'
+down_revision: Union[str, None] = '011_sync_logs_keyset'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS sync_stats_mv AS
+        SELECT
+            1 AS id,
+            count(*) AS total,
+            count(*) FILTER (WHERE status = 'success') AS successful,
+            count(*) FILTER (WHERE status = 'failed') AS failed,
+            count(*) FILTER (WHERE source = 'fips') AS fips,
+            count(*) FILTER (WHERE source = 'wipo') AS wipo,
+            max(created_at) AS last_sync,
+            now() AS refreshed_at
+        FROM sync_logs
+    """)
+    op.execute('CREATE UNIQUE INDEX IF NOT EXISTS ix_sync_stats_mv_id ON sync_stats_mv (id)')
+
+
+def downgrade() -> None:
+    op.execute('DROP MATERIALIZED VIEW IF EXISTS sync_stats_mv')
@@ -0,0 +1,55 @@
+"""Trigram indexes for rights holder and goods/services search.
+
+list_rights_holders matches RightsHolder.name ILIKE '%...%' and the
+trademark list falls back to TrademarkClass.goods_services_description
+ILIKE '%...%' when goods_search matches no ICGS class; GIN gin_trgm_ops
+lets both use an index instead of a sequential scan. Trademark names
+already have one (006); the equality filters of the trademark list are
+served by the existing territory_id, icgs_class and partial
+(territory_id, status, expiration_date) indexes.
+
+Revision ID: 013_search_trgm
+Revises: 012_sync_stats_mv
+Create Date: 2025-02-24
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '013_search_trgm'
+down_revision: Union[str, None] = '012_sync_stats_mv'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_rights_holders_name_trgm', 'rights_holders', 'name'),
+    ('ix_trademark_classes_goods_services_trgm', 'trademark_classes', 'goods_services_description'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(
+                name,
+                table,
+                [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _column in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,54 @@
+"""Btree on trademarks (name, id) for keyset pagination.
+
+GET /trademarks now pages with WHERE (name, id) > (:name, :id) ORDER BY
+name, id; a btree on both columns serves that with an index scan at any
+page depth. It also covers everything the single-column name index did,
+so that index is dropped.
+
+Revision ID: 014_trademarks_name_id
+Revises: 013_search_trgm
+Create Date: 2025-02-26
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '014_trademarks_name_id'
+down_revision: Union[str, None] = '013_search_trgm'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_trademarks_name_id',
+            'trademarks',
+            ['name', 'id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_trademarks_name',
+            table_name='trademarks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_trademarks_name',
+            'trademarks',
+            ['name'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_trademarks_name_id',
+            table_name='trademarks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
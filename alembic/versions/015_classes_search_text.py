@@ -0,0 +1,128 @@
+"""Generated search_text on trademark_classes for goods/services search.
+
+goods_search used to look up ICGS classes by keyword in Python and send
+either icgs_class IN (...) or, when nothing matched, an ILIKE on
+goods_services_description. search_text stores the description together
+with the class keywords (immutable icgs_keywords() function, a snapshot
+of app.core.icgs.ICGS_DIRECTORY at this revision), so the filter is a
+single ILIKE '%...%' served by a GIN trigram index. That index replaces
+the description-only one from 013.
+
+Revision ID: 015_classes_search_text
+Revises: 014_trademarks_name_id
+Create Date: 2025-02-27
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '015_classes_search_text'
+down_revision: Union[str, None] = '014_trademarks_name_id'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Снимок app.core.icgs на момент ревизии: миграция не должна меняться
+# вместе с кодом приложения. Новые ключевые слова — новой миграцией.
+ICGS_KEYWORDS_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION icgs_keywords(icgs_class integer)
+RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE icgs_class
+        WHEN 1 THEN 'химические продукты, удобрения, клеи, chemical'
+        WHEN 2 THEN 'краски, лаки, покрытия, paints'
+        WHEN 3 THEN 'косметика, парфюмерия, мыло, шампунь, зубная паста, cosmetics, perfume, soap'
+        WHEN 4 THEN 'масла, смазки, топливо, свечи, oils, fuels'
+        WHEN 5 THEN 'фармацевтика, лекарства, медицинские препараты, витамины, pharmaceutical, medicines'
+        WHEN 6 THEN 'металлы, металлоизделия, скобяные изделия, metals'
+        WHEN 7 THEN 'машины, станки, двигатели, machines, motors'
+        WHEN 8 THEN 'ручные инструменты, ножи, бритвы, tools, knives'
+        WHEN 9 THEN 'электроника, компьютеры, телефоны, программы, приложения, electronics, computers, software, apps'
+        WHEN 10 THEN 'медицинское оборудование, протезы, medical equipment'
+        WHEN 11 THEN 'освещение, отопление, кондиционеры, сантехника, lighting, heating'
+        WHEN 12 THEN 'транспорт, автомобили, велосипеды, vehicles, cars, bicycles'
+        WHEN 13 THEN 'оружие, боеприпасы, фейерверки, weapons, fireworks'
+        WHEN 14 THEN 'ювелирные изделия, часы, драгоценности, jewelry, watches'
+        WHEN 15 THEN 'музыкальные инструменты, musical instruments'
+        WHEN 16 THEN 'бумага, канцтовары, типография, paper, stationery, printing'
+        WHEN 17 THEN 'резина, пластик, изоляционные материалы, rubber, plastic'
+        WHEN 18 THEN 'кожа, сумки, чемоданы, зонты, leather, bags, luggage, umbrellas'
+        WHEN 19 THEN 'строительные материалы, стекло, бетон, building materials'
+        WHEN 20 THEN 'мебель, зеркала, рамки, furniture, mirrors'
+        WHEN 21 THEN 'посуда, кухонная утварь, щетки, kitchenware, brushes'
+        WHEN 22 THEN 'веревки, канаты, палатки, мешки, ropes, tents, bags'
+        WHEN 23 THEN 'пряжа, нити, yarns, threads'
+        WHEN 24 THEN 'ткани, текстиль, постельное белье, textiles, fabrics, bed linen'
+        WHEN 25 THEN 'одежда, обувь, головные уборы, clothing, footwear, shoes, headwear, fashion'
+        WHEN 26 THEN 'кружева, ленты, пуговицы, молнии, lace, ribbons, buttons, zippers'
+        WHEN 27 THEN 'ковры, коврики, обои, carpets, rugs, wallpaper'
+        WHEN 28 THEN 'игры, игрушки, спортивные товары, games, toys, sports'
+        WHEN 29 THEN 'мясо, рыба, молочные продукты, консервы, meat, fish, dairy, canned food'
+        WHEN 30 THEN 'кофе, чай, какао, хлеб, кондитерские изделия, шоколад, coffee, tea, bread, confectionery, chocolate'
+        WHEN 31 THEN 'сельхозпродукция, фрукты, овощи, семена, корма, agricultural, fruits, vegetables, seeds'
+        WHEN 32 THEN 'пиво, напитки безалкогольные, вода, соки, beer, soft drinks, water, juices'
+        WHEN 33 THEN 'алкогольные напитки, вино, водка, коньяк, alcoholic beverages, wine, vodka'
+        WHEN 34 THEN 'табак, сигареты, спички, tobacco, cigarettes'
+        WHEN 35 THEN 'реклама, маркетинг, бизнес, торговля, advertising, marketing, business, retail'
+        WHEN 36 THEN 'страхование, финансы, банковское дело, недвижимость, insurance, finance, banking, real estate'
+        WHEN 37 THEN 'строительство, ремонт, установка, construction, repair, installation'
+        WHEN 38 THEN 'телекоммуникации, связь, интернет, telecommunications, internet'
+        WHEN 39 THEN 'транспортировка, логистика, доставка, путешествия, transportation, logistics, delivery, travel'
+        WHEN 40 THEN 'обработка материалов, printing, processing'
+        WHEN 41 THEN 'образование, развлечения, спорт, культура, education, entertainment, sports, culture'
+        WHEN 42 THEN 'научные исследования, IT услуги, разработка ПО, дизайн, research, IT services, software development, design'
+        WHEN 43 THEN 'рестораны, отели, кафе, общепит, restaurants, hotels, catering'
+        WHEN 44 THEN 'медицинские услуги, салоны красоты, ветеринария, medical services, beauty salons, veterinary'
+        WHEN 45 THEN 'юридические услуги, охрана, legal services, security'
+        ELSE ''
+    END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.execute(ICGS_KEYWORDS_FUNCTION_SQL)
+    op.add_column(
+        'trademark_classes',
+        sa.Column(
+            'search_text',
+            sa.Text(),
+            sa.Computed(
+                "coalesce(goods_services_description, '') || ' ' || icgs_keywords(icgs_class)",
+                persisted=True,
+            ),
+        ),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_trademark_classes_search_text_trgm',
+            'trademark_classes',
+            ['search_text'],
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_trademark_classes_goods_services_trgm',
+            table_name='trademark_classes',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_trademark_classes_goods_services_trgm',
+            'trademark_classes',
+            ['goods_services_description'],
+            postgresql_using='gin',
+            postgresql_ops={'goods_services_description': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    op.drop_column('trademark_classes', 'search_text')
+    op.execute('DROP FUNCTION IF EXISTS icgs_keywords(integer)')
@@ -1,11 +1,15 @@
 """API dependencies for dependency injection."""
 
+import time
+from dataclasses import dataclass
+from hashlib import blake2b
 from typing import Optional
 from uuid import UUID
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import verify_access_token
@@ -14,81 +18,153 @@ from app.models import User
 from app.models.user import UserRole
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+
+@dataclass(frozen=True)
+class AuthContext:
+    """Authenticated caller: only the columns needed for authorization."""
+
+    id: UUID
+    is_active: bool
+    role: str
+
+    @property
+    def is_admin(self) -> bool:
+        """Check if the caller has admin role."""
+        return self.role == UserRole.ADMIN.value
+
+
+# Параметры ответов об ошибках авторизации; сами исключения создаём на
+# каждый raise — общий экземпляр копил бы __traceback__ всех запросов
+_INVALID_TOKEN = dict(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Invalid or expired token",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+_USER_NOT_FOUND = dict(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="User not found",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+_ACCOUNT_DISABLED = dict(
+    status_code=status.HTTP_403_FORBIDDEN,
+    detail="User account is disabled",
+)
+_ADMIN_REQUIRED = dict(
+    status_code=status.HTTP_403_FORBIDDEN,
+    detail="Admin privileges required",
+)
+
+# Построены один раз при импорте; в запросе меняются только параметры
+_USER_AUTH_BY_ID = select(User.id, User.is_active, User.role).where(
+    User.id == bindparam("user_id")
+)
+
+# Токен -> (AuthContext, exp). Повторные запросы с тем же токеном не
+# проверяют подпись и не ходят в БД; деактивация или смена роли вступают
+# в силу не позже чем через USER_CACHE_TTL секунд. Истёкший токен из кэша
+# не обслуживается, даже если запись ещё жива.
+USER_CACHE_TTL = 30
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL)
+
+
+def _token_key(token: str) -> bytes:
+    """Cache key for a bearer token (the raw token is never stored)."""
+    return blake2b(token.encode(), digest_size=16).digest()
+
+
+async def _authenticate(
+    token: str,
+    db: AsyncSession,
+    admin_only: bool = False,
+) -> AuthContext:
+    """Resolve a bearer token to an active user, optionally requiring admin."""
+    cache_key = _token_key(token)
+    cached = _user_cache.get(cache_key)
+    if cached is not None:
+        auth, expires_at = cached
+        if expires_at > time.time():
+            if admin_only and not auth.is_admin:
+                raise HTTPException(**_ADMIN_REQUIRED)
+            return auth
+        _user_cache.pop(cache_key, None)
+
+    claims = verify_access_token(token)
+
+    if claims is None:
+        raise HTTPException(**_INVALID_TOKEN)
+
+    user_id, role, expires_at = claims
+
+    # Токен с ролью не-admin отклоняем без запроса к БД. Старые токены без
+    # claim "role" и токены с role=admin проверяются по БД ниже.
+    if admin_only and role is not None and role != UserRole.ADMIN.value:
+        raise HTTPException(**_ADMIN_REQUIRED)
+
+    result = await db.execute(_USER_AUTH_BY_ID, {"user_id": user_id})
+    row = result.one_or_none()
+
+    if row is None:
+        raise HTTPException(**_USER_NOT_FOUND)
+
+    if not row.is_active:
+        raise HTTPException(**_ACCOUNT_DISABLED)
+
+    auth = AuthContext(id=row.id, is_active=row.is_active, role=row.role)
+    _user_cache[cache_key] = (auth, expires_at)
+
+    if admin_only and not auth.is_admin:
+        raise HTTPException(**_ADMIN_REQUIRED)
+
+    return auth
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> AuthContext:
     """Get the current authenticated user."""
-    token = credentials.credentials
-    user_id = verify_access_token(token)
+    return await _authenticate(credentials.credentials, db)
 
-    if user_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+async def get_current_user_full(
+    current_user: AuthContext = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """Get the full user row, for endpoints that read or change profile data."""
+    user = await db.get(User, current_user.id)
 
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User account is disabled",
-        )
+        raise HTTPException(**_USER_NOT_FOUND)
 
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: AuthContext = Depends(get_current_user),
+) -> AuthContext:
     """Get the current active user."""
     return current_user
 
 
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+) -> AuthContext:
     """Get the current user if they have admin role."""
-    if current_user.role != UserRole.ADMIN.value:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin privileges required",
-        )
-    return current_user
+    return await _authenticate(credentials.credentials, db, admin_only=True)
 
 
 async def get_optional_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(
-        HTTPBearer(auto_error=False)
-    ),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
     db: AsyncSession = Depends(get_db),
-) -> Optional[User]:
+) -> Optional[AuthContext]:
     """Get the current user if authenticated, otherwise None."""
     if credentials is None:
         return None
 
-    token = credentials.credentials
-    user_id = verify_access_token(token)
-
-    if user_id is None:
+    try:
+        return await _authenticate(credentials.credentials, db)
+    except HTTPException:
         return None
-
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-
-    if user is None or not user.is_active:
-        return None
-
-    return user
@@ -1,19 +1,29 @@
 """Authentication API endpoints."""
 
 from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, get_current_admin_user
+from app.api.deps import (
+    AuthContext,
+    get_current_admin_user,
+    get_current_user,
+    get_current_user_full,
+)
 from app.core.security import (
     create_token_pair,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_and_update_password_async,
+    verify_password_async,
     verify_refresh_token,
 )
-from app.database import get_db
+from app.database import async_session_maker, get_db
 from app.models import User
 from app.schemas.user import (
     Token,
@@ -27,46 +37,81 @@ from app.schemas.user import (
 
 router = APIRouter()
 
+# user_id -> role пользователей, чья активность недавно проверена при
+# refresh: повторный refresh в пределах TTL не ходит в БД.
+ACTIVE_CHECK_TTL = 60
+_recently_active: TTLCache = TTLCache(maxsize=10_000, ttl=ACTIVE_CHECK_TTL)
+
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_USER_STATUS = select(User.is_active, User.role).where(User.id == bindparam("user_id"))
+
+
+async def _record_login(
+    user_id: UUID, logged_in_at: datetime, password_hash: Optional[str] = None
+) -> None:
+    """Store the last login time (and an upgraded hash) in its own short transaction."""
+    values = {"last_login_at": logged_in_at}
+    if password_hash is not None:
+        values["password_hash"] = password_hash
+    async with async_session_maker() as session:
+        await session.execute(update(User).where(User.id == user_id).values(**values))
+        await session.commit()
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user),
+    current_admin: AuthContext = Depends(get_current_admin_user),
 ) -> User:
     """Register a new user (admin only)."""
-    # Check if email already exists
-    result = await db.execute(select(User).where(User.email == user_data.email))
-    if result.scalar_one_or_none():
+    password_hash = await get_password_hash_async(user_data.password)
+
+    # Single round-trip: the unique constraint on email decides, no pre-check
+    stmt = (
+        pg_insert(User)
+        .values(
+            email=user_data.email,
+            password_hash=password_hash,
+            full_name=user_data.full_name,
+            role=user_data.role,
+            preferred_language=user_data.preferred_language,
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    result = await db.execute(stmt)
+    user = result.scalar_one_or_none()
+
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
 
-    # Create user
-    user = User(
-        email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
-        full_name=user_data.full_name,
-        role=user_data.role,
-        preferred_language=user_data.preferred_language,
-    )
-    db.add(user)
-    await db.flush()
-
     return user
 
 
 @router.post("/login", response_model=Token)
 async def login(
     credentials: UserLogin,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ) -> Token:
     """Authenticate user and return tokens."""
-    result = await db.execute(select(User).where(User.email == credentials.email))
+    result = await db.execute(_USER_BY_EMAIL, {"email": credentials.email})
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+
+    verified, new_hash = await verify_and_update_password_async(
+        credentials.password, user.password_hash
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -78,11 +123,11 @@ async def login(
             detail="User account is disabled",
         )
 
-    # Update last login
-    user.last_login_at = datetime.now(timezone.utc)
-    await db.flush()
+    # last_login_at пишется после отправки ответа, вне транзакции запроса;
+    # там же старый bcrypt-хеш заменяется на argon2id
+    background_tasks.add_task(_record_login, user.id, datetime.now(timezone.utc), new_hash)
 
-    tokens = create_token_pair(user.id)
+    tokens = create_token_pair(user.id, user.role)
     return Token(
         access_token=tokens.access_token,
         refresh_token=tokens.refresh_token,
@@ -103,16 +148,20 @@ async def refresh_token(
             detail="Invalid or expired refresh token",
         )
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    role = _recently_active.get(user_id)
+    if role is None:
+        result = await db.execute(_USER_STATUS, {"user_id": user_id})
+        row = result.one_or_none()
 
-    if not user or not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found or inactive",
-        )
+        if row is None or not row.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or inactive",
+            )
+        role = row.role
+        _recently_active[user_id] = role
 
-    tokens = create_token_pair(user.id)
+    tokens = create_token_pair(user_id, role)
     return Token(
         access_token=tokens.access_token,
         refresh_token=tokens.refresh_token,
@@ -121,7 +170,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_full),
 ) -> User:
     """Get current user information."""
     return current_user
@@ -131,33 +180,43 @@ async def get_current_user_info(
 async def update_current_user(
     user_data: UserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> User:
     """Update current user information."""
+    # model_dump() already serializes nested NotificationPreferences to a dict
     update_data = user_data.model_dump(exclude_unset=True)
-
-    for field, value in update_data.items():
-        if field == "notification_preferences" and value:
-            setattr(current_user, field, value.model_dump())
-        else:
-            setattr(current_user, field, value)
-
-    await db.flush()
-    return current_user
+    if update_data.get("notification_preferences", {}) is None:
+        # Column is NOT NULL: an explicit null means "leave as is"
+        del update_data["notification_preferences"]
+
+    if not update_data:
+        return await db.get(User, current_user.id)
+
+    stmt = (
+        update(User)
+        .where(User.id == current_user.id)
+        .values(**update_data)
+        .returning(User)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one()
 
 
 @router.post("/me/change-password", status_code=status.HTTP_204_NO_CONTENT)
 async def change_password(
     password_data: UserPasswordChange,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_full),
 ) -> None:
     """Change current user's password."""
-    if not verify_password(password_data.current_password, current_user.password_hash):
+    if not await verify_password_async(
+        password_data.current_password, current_user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
         )
 
-    current_user.password_hash = get_password_hash(password_data.new_password)
+    current_user.password_hash = await get_password_hash_async(password_data.new_password)
     await db.flush()
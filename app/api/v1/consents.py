@@ -1,20 +1,26 @@
 """Consent letters API endpoints."""
 
+import asyncio
+import logging
+import os
+
 import httpx
-import re
+from cachetools import TTLCache
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
-from app.api.deps import get_current_user, get_current_admin_user
+from app.api.deps import AuthContext, get_current_user, get_current_admin_user
+from app.core.streaming import iter_file_chunks
+from app.core.text import LIKE_ESCAPE, contains_pattern
 from app.database import get_db
-from app.models import User, ConsentLetter, RightsHolder
+from app.models import ConsentLetter, RightsHolder
 from app.schemas.consent import (
     ConsentLetterCreate,
     ConsentLetterUpdate,
@@ -25,6 +31,22 @@ from app.services.consent_generator import generate_consent_docx, save_consent_d
 
 router = APIRouter()
 
+# Для одной записи - один запрос с JOIN; raiseload не даёт selectin-связям
+# правообладателя (trademarks) подтянуть всё его дерево
+_WITH_RIGHTS_HOLDER = joinedload(ConsentLetter.rights_holder).raiseload("*")
+
+# ИНН -> CompanyInfo. Найденные компании кэшируем на сутки, "не найдено" -
+# на 5 минут; ошибки и таймауты не кэшируются.
+INN_CACHE_TTL = 24 * 60 * 60
+INN_NEGATIVE_CACHE_TTL = 5 * 60
+_inn_cache: TTLCache = TTLCache(maxsize=10_000, ttl=INN_CACHE_TTL)
+_inn_negative_cache: TTLCache = TTLCache(maxsize=10_000, ttl=INN_NEGATIVE_CACHE_TTL)
+
+# Паузы между опросами результата поиска (~3 с в сумме) и предел
+# одновременных обращений к egrul.nalog.ru
+EGRUL_POLL_DELAYS = (0.1, 0.2, 0.4, 0.8, 1.5)
+_egrul_semaphore = asyncio.Semaphore(16)
+
 
 class CompanyInfo(BaseModel):
     """Company information from INN lookup."""
@@ -38,112 +60,128 @@ class CompanyInfo(BaseModel):
     found: bool = False
 
 
+async def _fetch_company_by_inn(client: httpx.AsyncClient, inn: str) -> CompanyInfo:
+    """Query egrul.nalog.ru; network and HTTP errors propagate to the caller."""
+    async with _egrul_semaphore:
+        # Step 1: Start search on egrul.nalog.ru
+        search_response = await client.post("/", data={"query": inn})
+        search_response.raise_for_status()
+        token = search_response.json().get("t")
+
+        if not token:
+            return CompanyInfo(inn=inn, found=False)
+
+        # Step 2: Poll for results until the search completes
+        rows = None
+        for delay in EGRUL_POLL_DELAYS:
+            await asyncio.sleep(delay)
+            result_response = await client.get(f"/search-result/{token}")
+            if result_response.status_code == 200:
+                rows = result_response.json().get("rows")
+                if rows is not None:
+                    break
+
+    if rows is None:
+        raise httpx.TimeoutException(f"egrul search for {inn} did not complete")
+
+    if not rows:
+        return CompanyInfo(inn=inn, found=False)
+
+    row = rows[0]
+    return CompanyInfo(
+        inn=inn,
+        name=row.get("n"),  # Short name
+        full_name=row.get("c"),  # Full name
+        address=row.get("a"),  # Address
+        ogrn=row.get("o"),  # OGRN
+        kpp=row.get("p"),  # KPP
+        status=row.get("s"),  # Status
+        found=True,
+    )
+
+
 @router.get("/lookup-inn/{inn}", response_model=CompanyInfo)
 async def lookup_company_by_inn(
     inn: str,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: AuthContext = Depends(get_current_user),
 ) -> CompanyInfo:
     """Look up company information by INN using egrul.nalog.ru."""
     # Validate INN format (10 or 12 digits)
-    if not re.match(r'^\d{10}$|^\d{12}$', inn):
+    if len(inn) not in (10, 12) or not (inn.isascii() and inn.isdigit()):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid INN format. Must be 10 or 12 digits.",
         )
 
-    try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            # Step 1: Start search on egrul.nalog.ru
-            search_response = await client.post(
-                "https://egrul.nalog.ru/",
-                data={"query": inn},
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                    "Accept": "application/json, text/javascript, */*; q=0.01",
-                    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-                    "X-Requested-With": "XMLHttpRequest",
-                }
-            )
-
-            if search_response.status_code == 200:
-                search_data = search_response.json()
-                token = search_data.get("t")
-
-                if token:
-                    # Step 2: Wait and get results
-                    import asyncio
-                    await asyncio.sleep(1)
-
-                    result_response = await client.get(
-                        f"https://egrul.nalog.ru/search-result/{token}",
-                        headers={
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                            "Accept": "application/json",
-                        }
-                    )
-
-                    if result_response.status_code == 200:
-                        result_data = result_response.json()
-                        rows = result_data.get("rows", [])
-
-                        if rows:
-                            row = rows[0]
-                            return CompanyInfo(
-                                inn=inn,
-                                name=row.get("n"),  # Short name
-                                full_name=row.get("c"),  # Full name
-                                address=row.get("a"),  # Address
-                                ogrn=row.get("o"),  # OGRN
-                                kpp=row.get("p"),  # KPP
-                                status=row.get("s"),  # Status
-                                found=True,
-                            )
+    cached = _inn_cache.get(inn) or _inn_negative_cache.get(inn)
+    if cached is not None:
+        return cached
+
+    # Общий клиент из lifespan: keep-alive соединения переиспользуются
+    client = request.app.state.egrul_client
 
+    try:
+        company = await _fetch_company_by_inn(client, inn)
     except httpx.TimeoutException:
-        pass
+        return CompanyInfo(inn=inn, found=False)
     except Exception as e:
-        import logging
         logging.error(f"INN lookup error: {e}")
+        return CompanyInfo(inn=inn, found=False)
+
+    if company.found:
+        _inn_cache[inn] = company
+    else:
+        _inn_negative_cache[inn] = company
 
-    # Return not found
-    return CompanyInfo(inn=inn, found=False)
+    return company
 
 
 @router.get("", response_model=ConsentLetterListResponse)
 async def list_consents(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     rights_holder_id: Optional[UUID] = None,
     search: Optional[str] = None,
 ) -> ConsentLetterListResponse:
     """List consent letters with filtering and pagination."""
-    query = select(ConsentLetter).options(
-        selectinload(ConsentLetter.rights_holder)
-    )
+    filters = []
 
     if rights_holder_id:
-        query = query.where(ConsentLetter.rights_holder_id == rights_holder_id)
+        filters.append(ConsentLetter.rights_holder_id == rights_holder_id)
 
     if search:
-        query = query.where(
-            (ConsentLetter.recipient_name_ru.ilike(f"%{search}%")) |
-            (ConsentLetter.recipient_name_en.ilike(f"%{search}%")) |
-            (ConsentLetter.trademark_name.ilike(f"%{search}%"))
+        pattern = contains_pattern(search)
+        filters.append(
+            (ConsentLetter.recipient_name_ru.ilike(pattern, escape=LIKE_ESCAPE)) |
+            (ConsentLetter.recipient_name_en.ilike(pattern, escape=LIKE_ESCAPE)) |
+            (ConsentLetter.trademark_name.ilike(pattern, escape=LIKE_ESCAPE))
         )
 
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    result = await db.execute(count_query)
-    total = result.scalar()
-
-    # Paginate
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    query = query.order_by(ConsentLetter.created_at.desc())
+    # Page and total in one round-trip: count(*) OVER () is computed before LIMIT
+    query = (
+        select(ConsentLetter, func.count().over().label("total"))
+        .where(*filters)
+        .options(selectinload(ConsentLetter.rights_holder))
+        .order_by(ConsentLetter.created_at.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
 
     result = await db.execute(query)
-    consents = result.scalars().all()
+    rows = result.all()
+    consents = [row.ConsentLetter for row in rows]
+
+    if rows:
+        total = rows[0].total
+    elif page == 1:
+        total = 0
+    else:
+        # Страница за пределами выборки: строк нет, total узнаём отдельно
+        result = await db.execute(select(func.count(ConsentLetter.id)).where(*filters))
+        total = result.scalar()
 
     pages = (total + page_size - 1) // page_size
 
@@ -160,13 +198,13 @@ async def list_consents(
 async def get_consent(
     consent_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> ConsentLetter:
     """Get a single consent letter by ID."""
     query = (
         select(ConsentLetter)
         .where(ConsentLetter.id == consent_id)
-        .options(selectinload(ConsentLetter.rights_holder))
+        .options(_WITH_RIGHTS_HOLDER)
     )
 
     result = await db.execute(query)
@@ -185,7 +223,7 @@ async def get_consent(
 async def create_consent(
     consent_data: ConsentLetterCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> ConsentLetter:
     """Create a new consent letter."""
     # Validate rights holder exists
@@ -231,7 +269,7 @@ async def create_consent(
     query = (
         select(ConsentLetter)
         .where(ConsentLetter.id == consent.id)
-        .options(selectinload(ConsentLetter.rights_holder))
+        .options(_WITH_RIGHTS_HOLDER)
     )
     result = await db.execute(query)
     return result.scalar_one()
@@ -242,13 +280,13 @@ async def update_consent(
     consent_id: UUID,
     consent_data: ConsentLetterUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> ConsentLetter:
     """Update a consent letter."""
     query = (
         select(ConsentLetter)
         .where(ConsentLetter.id == consent_id)
-        .options(selectinload(ConsentLetter.rights_holder))
+        .options(_WITH_RIGHTS_HOLDER)
     )
 
     result = await db.execute(query)
@@ -273,7 +311,7 @@ async def update_consent(
 async def delete_consent(
     consent_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> None:
     """Delete a consent letter (admin only)."""
     result = await db.execute(select(ConsentLetter).where(ConsentLetter.id == consent_id))
@@ -292,14 +330,14 @@ async def delete_consent(
 async def download_consent(
     consent_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ):
     """Generate and download consent letter as DOCX."""
     # Get consent with rights holder
     query = (
         select(ConsentLetter)
         .where(ConsentLetter.id == consent_id)
-        .options(selectinload(ConsentLetter.rights_holder))
+        .options(_WITH_RIGHTS_HOLDER)
     )
 
     result = await db.execute(query)
@@ -319,8 +357,13 @@ async def download_consent(
     date_str = consent.document_date.strftime('%d.%m.%Y')
     filename = f"Authorization_letter_for_{recipient_short}_{date_str}.docx"
 
+    size = buffer.seek(0, os.SEEK_END)
+
     return StreamingResponse(
-        buffer,
+        iter_file_chunks(buffer),
         media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(size),
+        },
     )
@@ -1,71 +1,57 @@
 """Import data API endpoint - for uploading Excel files with trademark data."""
 
+import asyncio
+import logging
+import os
 import re
-import unicodedata
-from datetime import date, datetime
-from io import BytesIO
-from typing import Dict, List, Optional
+import shutil
+import tempfile
+import uuid
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import pandas as pd
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy import select
+from cachetools import LRUCache, TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy import String, any_, bindparam, func, insert, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_admin_user
-from app.database import get_db
+from app.api.deps import AuthContext, get_current_admin_user
+from app.core.text import normalize_text
+from app.database import async_session_maker
 from app.models import (
     RightsHolder,
     Territory,
     Trademark,
     TrademarkClass,
     TrademarkRegistration,
-    User,
 )
 from app.models.trademark import RegistrationStatus, RenewalStatus
+from app.services.import_status import match_status
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
 
-def normalize_text(text: str) -> str:
-    """Normalize text for comparison."""
-    if not text:
-        return ""
-    text = unicodedata.normalize("NFKC", str(text))
-    text = re.sub(r"\s+", " ", text)
-    return text.strip().lower()
-
-
-def parse_date(value) -> Optional[date]:
-    """Parse date from various formats."""
-    if pd.isna(value) or value == "нет" or value == "":
-        return None
-    if isinstance(value, datetime):
-        return value.date()
-    if isinstance(value, date):
-        return value
-    if isinstance(value, str):
-        value = value.strip()
-        if value.lower() in ("нет", "no", "-", ""):
-            return None
-        for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"):
-            try:
-                return datetime.strptime(value, fmt).date()
-            except ValueError:
-                continue
-    return None
+# task_id -> состояние фонового импорта. Хранится в процессе: деплой
+# с импортом (Render) работает одним воркером uvicorn.
+IMPORT_JOB_TTL = 24 * 60 * 60
+_import_jobs: TTLCache = TTLCache(maxsize=1000, ttl=IMPORT_JOB_TTL)
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _valid_classes(matches: List[str]) -> List[int]:
+    """Sorted distinct ICGS classes (1-45) from matched digit strings."""
+    return sorted({n for n in map(int, matches) if 1 <= n <= 45})
 
 
 def parse_classes(value) -> List[int]:
     """Parse ICGS classes from comma/space separated string."""
     if pd.isna(value) or not value:
         return []
-    text = str(value)
-    classes = []
-    for match in re.findall(r"\d+", text):
-        class_num = int(match)
-        if 1 <= class_num <= 45:
-            classes.append(class_num)
-    return sorted(set(classes))
+    return _valid_classes(_DIGITS_RE.findall(str(value)))
 
 
 def map_status(value: str) -> str:
@@ -73,31 +59,7 @@ def map_status(value: str) -> str:
     if pd.isna(value) or not value:
         return RegistrationStatus.PENDING.value
 
-    status_lower = normalize_text(value)
-    mapping = {
-        "регистрация": RegistrationStatus.REGISTERED.value,
-        "регисрация": RegistrationStatus.REGISTERED.value,
-        "registration": RegistrationStatus.REGISTERED.value,
-        "отказ": RegistrationStatus.REJECTED.value,
-        "rejection": RegistrationStatus.REJECTED.value,
-        "refused": RegistrationStatus.REJECTED.value,
-        "частичная регистрация": RegistrationStatus.PARTIAL_REGISTRATION.value,
-        "partial": RegistrationStatus.PARTIAL_REGISTRATION.value,
-        "действие прекращено": RegistrationStatus.TERMINATED.value,
-        "terminated": RegistrationStatus.TERMINATED.value,
-        "делопроизводство": RegistrationStatus.PENDING.value,
-        "pending": RegistrationStatus.PENDING.value,
-        "экспертиза": RegistrationStatus.PENDING.value,
-        "examination": RegistrationStatus.PENDING.value,
-        "период оппозиции": RegistrationStatus.OPPOSITION.value,
-        "opposition": RegistrationStatus.OPPOSITION.value,
-        "решение о регистрации": RegistrationStatus.DECISION_PENDING.value,
-    }
-
-    for key, mapped_status in mapping.items():
-        if key in status_lower:
-            return mapped_status
-    return RegistrationStatus.PENDING.value
+    return match_status(normalize_text(value))
 
 
 def is_yes(value) -> bool:
@@ -134,14 +96,186 @@ def guess_region(name: str) -> str:
     return "other"
 
 
+# Каноническое поле -> варианты заголовков Excel в порядке приоритета
+COLUMN_ALIASES: Dict[str, List[str]] = {
+    "name": ["Товарный знак (наименование)", "Товарный знак", "Наименование", "Name", "Trademark"],
+    "territory": ["Территория/страна", "Территория", "Country", "Territory"],
+    "classes": ["Классы \nМКТУ", "Классы МКТУ", "МКТУ", "Classes", "ICGS"],
+    "holder": ["Правообладатель", "Owner", "Rights Holder"],
+    "filing_date": ["Дата подачи", "Filing Date"],
+    "priority_date": ["Дата Приоритета", "Дата приоритета", "Priority Date"],
+    "expiration_date": ["Cрок действия", "Срок действия", "Expiration Date", "Valid Until"],
+    "application_number": ["Номер заявки на регистрацию", "Номер заявки", "Application Number"],
+    "registration_number": [" Registration Number", "Registration Number", "Номер регистрации", "Регистрационный номер"],
+    "status": ["Результат", "Status", "Статус"],
+    "is_national": ["Национальная заявка", "National"],
+    "is_international": ["Международная заявка", "International"],
+    "comments": ["комментарии", "Комментарии", "Comments", "Notes"],
+}
+
+_EMPTY_NUMBERS = ("нет", "no", "-")
+_EMPTY_DATES = ("нет", "no", "-", "")
+
+# Форматы дат по очереди: ISO (в т.ч. "YYYY-MM-DD HH:MM:SS" от dtype=str),
+# затем русский и через слэш
+_DATE_FORMATS = ("ISO8601", "%d.%m.%Y", "%d/%m/%Y")
+
+# Строк Excel на один executemany-INSERT регистраций и классов
+IMPORT_BATCH_SIZE = 1000
+
+# Колонки COPY для регистраций. COPY не вызывает Python-default'ы модели,
+# поэтому id и external_ids передаются явно; created_at/updated_at - серверные
+_REGISTRATION_COPY_COLUMNS = (
+    "id",
+    "trademark_id",
+    "territory_id",
+    "filing_date",
+    "priority_date",
+    "expiration_date",
+    "application_number",
+    "registration_number",
+    "status",
+    "renewal_status",
+    "is_national",
+    "is_international",
+    "comments",
+    "external_ids",
+)
+
+
+class ImportRow(NamedTuple):
+    """One Excel row reduced to canonical, already parsed fields."""
+    name: Optional[str]
+    territory: str
+    classes: Optional[List[int]]
+    holder: Optional[str]
+    filing_date: Optional[date]
+    priority_date: Optional[date]
+    expiration_date: Optional[date]
+    application_number: Optional[str]
+    registration_number: Optional[str]
+    status: str
+    is_national: bool
+    is_international: bool
+    comments: Optional[str]
+
+
+def _present(df: pd.DataFrame, field: str) -> List[str]:
+    """Alias columns of a canonical field that exist in the sheet."""
+    return [col for col in COLUMN_ALIASES[field] if col in df.columns]
+
+
+def _coalesce(df: pd.DataFrame, columns: List[pd.Series]) -> pd.Series:
+    """Row-wise first non-missing value across alias columns; missing is None."""
+    if not columns:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    values = columns[0].to_numpy(dtype=object, copy=True)
+    for column in columns[1:]:
+        missing = pd.isna(values)
+        if not missing.any():
+            break
+        values[missing] = column.to_numpy(dtype=object)[missing]
+    values[pd.isna(values)] = None
+    return pd.Series(values, index=df.index, dtype=object)
+
+
+def _text(column: pd.Series, skip: Tuple[str, ...] = ()) -> pd.Series:
+    """Stripped strings; NaN, empty and placeholder cells become missing."""
+    text = column.astype(str).str.strip()
+    return text.where(column.notna() & (text != "") & ~text.isin(skip))
+
+
+def _classes(column: pd.Series) -> pd.Series:
+    """ICGS classes per cell; cells without valid classes become missing."""
+    found = column.fillna("").astype(str).str.findall(_DIGITS_RE)
+    return found.map(lambda matches: _valid_classes(matches) or None)
+
+
+def _dates(column: pd.Series) -> pd.Series:
+    """Parse a date column in C, trying each known format on the remaining cells."""
+    text = column.astype(str).str.strip()
+    text = text.where(column.notna() & ~text.str.lower().isin(_EMPTY_DATES))
+
+    parsed = pd.to_datetime(text, format=_DATE_FORMATS[0], errors="coerce")
+    for fmt in _DATE_FORMATS[1:]:
+        if not (parsed.isna() & text.notna()).any():
+            break
+        parsed = parsed.fillna(pd.to_datetime(text, format=fmt, errors="coerce"))
+
+    return parsed.dt.date.where(parsed.notna())
+
+
+def _map_unique(column: pd.Series, func) -> pd.Series:
+    """Apply func once per distinct cell value instead of once per row."""
+    mapping = {value: func(value) for value in column.dropna().unique()}
+    return column.map(mapping).where(column.notna(), func(None))
+
+
+def prepare_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Resolve column aliases and parse every field column-wise."""
+    fields = {
+        "name": _coalesce(df, [_text(df[col]) for col in _present(df, "name")]),
+        "territory": _coalesce(
+            df, [_text(df[col]) for col in _present(df, "territory")]
+        ).fillna("Russia"),
+        "classes": _coalesce(df, [_classes(df[col]) for col in _present(df, "classes")]),
+        "holder": _coalesce(df, [_text(df[col]) for col in _present(df, "holder")]),
+        "comments": _coalesce(df, [_text(df[col]) for col in _present(df, "comments")]),
+    }
+
+    for field in ("filing_date", "priority_date", "expiration_date"):
+        fields[field] = _coalesce(
+            df, [_dates(df[col]) for col in _present(df, field)]
+        )
+
+    for field in ("application_number", "registration_number"):
+        fields[field] = _coalesce(
+            df, [_text(df[col], skip=_EMPTY_NUMBERS) for col in _present(df, field)]
+        )
+
+    # Статус и флаги берутся из первой найденной колонки, даже если ячейка пуста
+    status_cols = _present(df, "status")
+    fields["status"] = (
+        _map_unique(df[status_cols[0]], map_status) if status_cols
+        else pd.Series(RegistrationStatus.PENDING.value, index=df.index)
+    )
+    for field in ("is_national", "is_international"):
+        flag_cols = _present(df, field)
+        fields[field] = (
+            _map_unique(df[flag_cols[0]], is_yes).astype(bool) if flag_cols
+            else pd.Series(False, index=df.index)
+        )
+
+    return pd.DataFrame(fields, index=df.index)[list(ImportRow._fields)]
+
+
+# Нормализованное имя -> id, общие для всех импортов процесса. Пополняются
+# только после commit, чтобы не запомнить id откатившейся вставки.
+_TERRITORY_IDS: LRUCache = LRUCache(maxsize=2048)
+_RIGHTS_HOLDER_IDS: LRUCache = LRUCache(maxsize=50_000)
+
+
+def _take_cached(names: Dict[str, str], shared: LRUCache, local: Dict) -> None:
+    """Move names already known to the process cache into the importer cache."""
+    for name_normalized in list(names):
+        cached_id = shared.get(name_normalized)
+        if cached_id is not None:
+            local[name_normalized] = cached_id
+            del names[name_normalized]
+
+
 class TrademarkImporter:
     """Import trademarks from Excel to database."""
 
     def __init__(self, session: AsyncSession):
         self.session = session
-        self.territories_cache: Dict[str, Territory] = {}
-        self.rights_holders_cache: Dict[str, RightsHolder] = {}
-        self.trademarks_cache: Dict[str, Trademark] = {}
+        # Нормализованное имя -> id; заполняются один раз до цикла по строкам
+        self.territories_cache: Dict[str, int] = {}
+        self.rights_holders_cache: Dict[str, uuid.UUID] = {}
+        self.trademarks_cache: Dict[str, uuid.UUID] = {}
+        self._pending_trademarks: List[Dict] = []
+        self._pending_classes: List[Dict] = []
+        self._pending_registrations: List[Tuple] = []
         self.stats = {
             "territories_created": 0,
             "rights_holders_created": 0,
@@ -152,236 +286,165 @@ class TrademarkImporter:
             "errors": 0,
         }
 
-    async def get_or_create_territory(self, name: str) -> Territory:
-        """Get or create territory by name."""
-        name_normalized = normalize_text(name)
+    @staticmethod
+    def _distinct_names(column: pd.Series) -> Dict[str, str]:
+        """Normalized name -> first spelling of it in the sheet."""
+        names: Dict[str, str] = {}
+        for name in column.dropna().unique():
+            names.setdefault(normalize_text(name), name)
+        return names
 
-        if name_normalized in self.territories_cache:
-            return self.territories_cache[name_normalized]
+    async def preload_territories(self, column: pd.Series) -> None:
+        """Resolve all territory names of the sheet, creating missing ones."""
+        names = self._distinct_names(column)
+        _take_cached(names, _TERRITORY_IDS, self.territories_cache)
 
-        # Check database
+        if not names:
+            return
+
+        # Точное совпадение с английским (name_normalized) или русским названием
+        lookup = bindparam("names", list(names), type_=ARRAY(String))
         result = await self.session.execute(
-            select(Territory).where(
-                Territory.name_en.ilike(f"%{name}%")
+            select(Territory.id, Territory.name_normalized, Territory.name_ru).where(
+                or_(
+                    Territory.name_normalized == any_(lookup),
+                    func.lower(Territory.name_ru) == any_(lookup),
+                )
             )
         )
-        territory = result.scalar_one_or_none()
+        for row in result:
+            self.territories_cache[row.name_normalized] = row.id
+            self.territories_cache.setdefault(row.name_ru.lower(), row.id)
 
-        if not territory:
-            # Also try Russian name
+        missing = [n for n in names if n not in self.territories_cache]
+        if missing:
             result = await self.session.execute(
-                select(Territory).where(
-                    Territory.name_ru.ilike(f"%{name}%")
-                )
-            )
-            territory = result.scalar_one_or_none()
-
-        if not territory:
-            territory = Territory(
-                iso_code=name[:2].upper(),
-                name_en=name.strip(),
-                name_ru=name.strip(),
-                region=guess_region(name),
+                insert(Territory).returning(Territory.id, Territory.name_normalized),
+                [
+                    {
+                        "iso_code": names[n][:2].upper(),
+                        "name_en": names[n],
+                        "name_ru": names[n],
+                        "name_normalized": n,
+                        "region": guess_region(names[n]),
+                    }
+                    for n in missing
+                ],
             )
-            self.session.add(territory)
-            await self.session.flush()
-            self.stats["territories_created"] += 1
-
-        self.territories_cache[name_normalized] = territory
-        return territory
-
-    async def get_or_create_rights_holder(self, name: str) -> Optional[RightsHolder]:
-        """Get or create rights holder by name."""
-        if pd.isna(name) or not name:
-            return None
+            for row in result:
+                self.territories_cache[row.name_normalized] = row.id
+            self.stats["territories_created"] += len(missing)
 
-        name_normalized = normalize_text(name)
-
-        if name_normalized in self.rights_holders_cache:
-            return self.rights_holders_cache[name_normalized]
+    async def preload_rights_holders(self, column: pd.Series) -> None:
+        """Resolve all rights holder names of the sheet, creating missing ones."""
+        names = self._distinct_names(column)
+        _take_cached(names, _RIGHTS_HOLDER_IDS, self.rights_holders_cache)
+        if not names:
+            return
 
         result = await self.session.execute(
-            select(RightsHolder).where(
-                RightsHolder.name_normalized == name_normalized
+            select(RightsHolder.id, RightsHolder.name_normalized).where(
+                RightsHolder.name_normalized == any_(
+                    bindparam("names", list(names), type_=ARRAY(String))
+                )
             )
         )
-        holder = result.scalar_one_or_none()
-
-        if not holder:
-            holder = RightsHolder(
-                name=name.strip(),
-                name_normalized=name_normalized,
+        for row in result:
+            self.rights_holders_cache[row.name_normalized] = row.id
+
+        missing = [n for n in names if n not in self.rights_holders_cache]
+        if missing:
+            # ON CONFLICT: параллельный импорт мог уже создать того же
+            # правообладателя - RETURNING вернёт id существующей строки
+            stmt = pg_insert(RightsHolder)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[RightsHolder.name_normalized],
+                set_={"name_normalized": stmt.excluded.name_normalized},
+            ).returning(
+                RightsHolder.id,
+                RightsHolder.name_normalized,
+                literal_column("xmax = 0").label("inserted"),
             )
-            self.session.add(holder)
-            await self.session.flush()
-            self.stats["rights_holders_created"] += 1
-
-        self.rights_holders_cache[name_normalized] = holder
-        return holder
+            result = await self.session.execute(
+                stmt,
+                [{"name": names[n], "name_normalized": n} for n in missing],
+            )
+            for row in result:
+                self.rights_holders_cache[row.name_normalized] = row.id
+                self.stats["rights_holders_created"] += row.inserted
 
-    async def get_or_create_trademark(
+    def get_or_create_trademark(
         self,
         name: str,
-        rights_holder: Optional[RightsHolder],
+        rights_holder_id: Optional[uuid.UUID],
         classes: List[int],
-    ) -> Trademark:
-        """Get or create trademark by name and rights holder."""
-        holder_id = str(rights_holder.id) if rights_holder else "none"
-        cache_key = f"{normalize_text(name)}|{holder_id}"
+    ) -> uuid.UUID:
+        """Get or queue a trademark by name and rights holder; returns its id."""
+        cache_key = f"{normalize_text(name)}|{rights_holder_id or 'none'}"
 
         if cache_key in self.trademarks_cache:
             return self.trademarks_cache[cache_key]
 
-        trademark = Trademark(
-            name=name.strip(),
-            rights_holder_id=rights_holder.id if rights_holder else None,
-        )
-        self.session.add(trademark)
-        await self.session.flush()
+        # id назначаем сразу: на него ссылаются классы и регистрации пачки.
+        # Без session.add - строки готовятся в потоке, сессию трогает только loop
+        trademark_id = uuid.uuid4()
+        self._pending_trademarks.append({
+            "id": trademark_id,
+            "name": name.strip(),
+            "rights_holder_id": rights_holder_id,
+        })
         self.stats["trademarks_created"] += 1
 
         for class_num in classes:
-            tm_class = TrademarkClass(
-                trademark_id=trademark.id,
-                icgs_class=class_num,
+            self._pending_classes.append(
+                {"trademark_id": trademark_id, "icgs_class": class_num}
             )
-            self.session.add(tm_class)
             self.stats["classes_created"] += 1
 
-        self.trademarks_cache[cache_key] = trademark
-        return trademark
+        self.trademarks_cache[cache_key] = trademark_id
+        return trademark_id
 
-    async def import_row(self, row: pd.Series) -> bool:
-        """Import single row from Excel."""
+    def import_row(self, row: ImportRow) -> bool:
+        """Queue a single prepared row for the next flush."""
         try:
-            # Try different column names for trademark name
-            tm_name = None
-            for col in ["Товарный знак (наименование)", "Товарный знак", "Наименование", "Name", "Trademark"]:
-                if col in row and not pd.isna(row.get(col)):
-                    tm_name = str(row.get(col)).strip()
-                    if tm_name:
-                        break
-
-            if not tm_name:
+            if not row.name:
                 return False
 
-            # Territory
-            territory_name = "Russia"
-            for col in ["Территория/страна", "Территория", "Country", "Territory"]:
-                if col in row and not pd.isna(row.get(col)):
-                    territory_name = str(row.get(col)).strip()
-                    break
-
-            # Classes
-            classes = []
-            for col in ["Классы \nМКТУ", "Классы МКТУ", "МКТУ", "Classes", "ICGS"]:
-                if col in row:
-                    classes = parse_classes(row.get(col))
-                    if classes:
-                        break
-
-            # Rights holder
-            holder_name = None
-            for col in ["Правообладатель", "Owner", "Rights Holder"]:
-                if col in row and not pd.isna(row.get(col)):
-                    holder_name = str(row.get(col)).strip()
-                    break
-
-            # Dates
-            filing_date = None
-            for col in ["Дата подачи", "Filing Date"]:
-                if col in row:
-                    filing_date = parse_date(row.get(col))
-                    if filing_date:
-                        break
-
-            priority_date = None
-            for col in ["Дата Приоритета", "Дата приоритета", "Priority Date"]:
-                if col in row:
-                    priority_date = parse_date(row.get(col))
-                    if priority_date:
-                        break
-
-            expiration_date = None
-            for col in ["Cрок действия", "Срок действия", "Expiration Date", "Valid Until"]:
-                if col in row:
-                    expiration_date = parse_date(row.get(col))
-                    if expiration_date:
-                        break
-
-            # Numbers
-            application_number = None
-            for col in ["Номер заявки на регистрацию", "Номер заявки", "Application Number"]:
-                if col in row and not pd.isna(row.get(col)):
-                    val = row.get(col)
-                    if val and str(val).strip() not in ("нет", "no", "-"):
-                        application_number = str(val).strip()
-                        break
-
-            registration_number = None
-            for col in [" Registration Number", "Registration Number", "Номер регистрации", "Регистрационный номер"]:
-                if col in row and not pd.isna(row.get(col)):
-                    val = row.get(col)
-                    if val and str(val).strip() not in ("нет", "no", "-"):
-                        registration_number = str(val).strip()
-                        break
-
-            # Status
-            status_val = RegistrationStatus.PENDING.value
-            for col in ["Результат", "Status", "Статус"]:
-                if col in row:
-                    status_val = map_status(row.get(col))
-                    break
-
-            # Type flags
-            is_national = False
-            for col in ["Национальная заявка", "National"]:
-                if col in row:
-                    is_national = is_yes(row.get(col))
-                    break
-
-            is_international = False
-            for col in ["Международная заявка", "International"]:
-                if col in row:
-                    is_international = is_yes(row.get(col))
-                    break
-
-            # Comments
-            comments = None
-            for col in ["комментарии", "Комментарии", "Comments", "Notes"]:
-                if col in row and not pd.isna(row.get(col)):
-                    comments = str(row.get(col)).strip()
-                    break
-
             # Create entities
-            territory = await self.get_or_create_territory(territory_name)
-            rights_holder = await self.get_or_create_rights_holder(holder_name)
-            trademark = await self.get_or_create_trademark(tm_name, rights_holder, classes)
-
+            territory_id = self.territories_cache[normalize_text(row.territory)]
+            rights_holder_id = (
+                self.rights_holders_cache[normalize_text(row.holder)]
+                if row.holder else None
+            )
+            trademark_id = self.get_or_create_trademark(
+                row.name, rights_holder_id, row.classes or []
+            )
             # Determine renewal status
             renewal_status = RenewalStatus.ACTIVE.value
-            if status_val == RegistrationStatus.TERMINATED.value:
+            if row.status == RegistrationStatus.TERMINATED.value:
                 renewal_status = RenewalStatus.EXPIRED.value
-            elif status_val == RegistrationStatus.REJECTED.value:
+            elif row.status == RegistrationStatus.REJECTED.value:
                 renewal_status = RenewalStatus.NOT_RENEWING.value
-            elif expiration_date and expiration_date < date.today():
+            elif row.expiration_date and row.expiration_date < date.today():
                 renewal_status = RenewalStatus.EXPIRED.value
 
-            registration = TrademarkRegistration(
-                trademark_id=trademark.id,
-                territory_id=territory.id,
-                filing_date=filing_date,
-                priority_date=priority_date,
-                expiration_date=expiration_date,
-                application_number=application_number,
-                registration_number=registration_number,
-                status=status_val,
-                renewal_status=renewal_status,
-                is_national=is_national,
-                is_international=is_international,
-                comments=comments,
-            )
-            self.session.add(registration)
+            # Порядок значений - _REGISTRATION_COPY_COLUMNS
+            self._pending_registrations.append((
+                uuid.uuid4(),
+                trademark_id,
+                territory_id,
+                row.filing_date,
+                row.priority_date,
+                row.expiration_date,
+                row.application_number,
+                row.registration_number,
+                row.status,
+                renewal_status,
+                bool(row.is_national),
+                bool(row.is_international),
+                row.comments,
+                "{}",
+            ))
             self.stats["registrations_created"] += 1
             self.stats["rows_processed"] += 1
 
@@ -391,27 +454,101 @@ class TrademarkImporter:
             self.stats["errors"] += 1
             return False
 
-    async def import_dataframe(self, df: pd.DataFrame) -> Dict[str, int]:
-        """Import entire DataFrame."""
-        for idx, row in df.iterrows():
-            await self.import_row(row)
-            if (idx + 1) % 50 == 0:
-                await self.session.flush()
+    def _queue_rows(self, rows: pd.DataFrame) -> None:
+        """Queue a batch of prepared rows; CPU-only, runs in a worker thread."""
+        for values in rows.itertuples(index=False, name=None):
+            self.import_row(ImportRow._make(values))
+
+    async def flush_pending(self) -> None:
+        """Write queued trademarks and classes (executemany) and registrations (binary COPY)."""
+        # Сначала товарные знаки: на них ссылаются внешние ключи
+        if self._pending_trademarks:
+            await self.session.execute(insert(Trademark), self._pending_trademarks)
+            self._pending_trademarks.clear()
+
+        if self._pending_classes:
+            await self.session.execute(insert(TrademarkClass), self._pending_classes)
+            self._pending_classes.clear()
+
+        if self._pending_registrations:
+            # COPY идёт через то же соединение, т.е. в транзакции сессии
+            conn = await self.session.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                TrademarkRegistration.__tablename__,
+                records=self._pending_registrations,
+                columns=_REGISTRATION_COPY_COLUMNS,
+            )
+            self._pending_registrations.clear()
 
-        await self.session.commit()
+    async def import_dataframe(self, df: pd.DataFrame) -> Dict[str, int]:
+        """Import entire DataFrame in a single transaction."""
+        # Разбор и подготовка строк - чистый CPU: в потоке, чтобы не
+        # блокировать event loop для остальных запросов
+        rows = await asyncio.to_thread(prepare_rows, df)
+        try:
+            await self.preload_territories(rows["territory"])
+            await self.preload_rights_holders(rows["holder"])
+
+            for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+                batch = rows.iloc[start:start + IMPORT_BATCH_SIZE]
+                await asyncio.to_thread(self._queue_rows, batch)
+                await self.flush_pending()
+
+            await self.session.commit()
+        except Exception:
+            # Возможно, импорт упал на устаревшем id из кэша процесса
+            _TERRITORY_IDS.clear()
+            _RIGHTS_HOLDER_IDS.clear()
+            raise
+
+        _TERRITORY_IDS.update(self.territories_cache)
+        _RIGHTS_HOLDER_IDS.update(self.rights_holders_cache)
         return self.stats
 
 
-@router.post("/excel")
+def _read_excel(path: str) -> pd.DataFrame:
+    """Parse a workbook with calamine (Rust) instead of openpyxl."""
+    return pd.read_excel(path, engine="calamine", dtype=str)
+
+
+async def _run_import(task_id: str, path: str) -> None:
+    """Parse and import a saved upload, recording progress in the job registry."""
+    job = _import_jobs[task_id]
+    job["status"] = "running"
+    try:
+        df = await asyncio.to_thread(_read_excel, path)
+        if df.empty:
+            raise ValueError("Excel file is empty")
+
+        job["columns_found"] = list(df.columns)
+        async with async_session_maker() as session:
+            importer = TrademarkImporter(session)
+            # Ссылка на живой словарь: опрос статуса видит прогресс
+            job["statistics"] = importer.stats
+            stats = await importer.import_dataframe(df)
+
+        job["status"] = "completed"
+        job["message"] = f"Successfully imported {stats['rows_processed']} records"
+    except Exception as e:
+        logger.exception("Excel import %s failed", task_id)
+        job["status"] = "failed"
+        job["message"] = f"Error processing file: {str(e)}"
+    finally:
+        os.unlink(path)
+
+
+@router.post("/excel", status_code=status.HTTP_202_ACCEPTED)
 async def import_excel(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> Dict:
     """
-    Import trademarks from Excel file.
+    Start importing trademarks from an Excel file.
 
-    Only admin users can import data.
+    Only admin users can import data. The file is imported in the
+    background; poll GET /import/jobs/{task_id} for the result.
     Supported columns (in Russian or English):
     - Товарный знак / Trademark
     - Территория / Territory
@@ -429,30 +566,36 @@ async def import_excel(
             detail="File must be an Excel file (.xlsx or .xls)"
         )
 
-    try:
-        contents = await file.read()
-        df = pd.read_excel(BytesIO(contents))
+    # Файл сохраняется на диск, а не держится в памяти до конца импорта
+    suffix = os.path.splitext(file.filename)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        await asyncio.to_thread(shutil.copyfileobj, file.file, tmp)
+
+    task_id = str(uuid.uuid4())
+    _import_jobs[task_id] = {
+        "task_id": task_id,
+        "status": "pending",
+        "message": None,
+        "statistics": None,
+        "columns_found": None,
+    }
+    background_tasks.add_task(_run_import, task_id, tmp.name)
 
-        if df.empty:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Excel file is empty"
-            )
+    return {"task_id": task_id, "status": "pending"}
 
-        importer = TrademarkImporter(db)
-        stats = await importer.import_dataframe(df)
 
-        return {
-            "success": True,
-            "message": f"Successfully imported {stats['rows_processed']} records",
-            "statistics": stats,
-            "columns_found": list(df.columns),
-        }
+@router.get("/jobs/{task_id}")
+async def get_import_job(
+    task_id: str,
+    current_user: AuthContext = Depends(get_current_admin_user),
+) -> Dict:
+    """Get status and statistics of a background Excel import."""
+    job = _import_jobs.get(task_id)
 
-    except HTTPException:
-        raise
-    except Exception as e:
+    if job is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing file: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found",
         )
+
+    return job
@@ -5,13 +5,13 @@ from typing import List, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from sqlalchemy import bindparam, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
 
-from app.api.deps import get_current_user, get_current_admin_user
+from app.api.deps import AuthContext, get_current_user, get_current_admin_user
 from app.database import get_db
-from app.models import User, TrademarkRegistration, RenewalAction, Trademark, Territory
+from app.models import TrademarkRegistration, RenewalAction, Trademark, Territory
 from app.models.trademark import RenewalStatus
 from app.schemas.trademark import (
     RegistrationResponse,
@@ -21,23 +21,100 @@ from app.schemas.trademark import (
 
 router = APIRouter()
 
+# RegistrationResponse сериализует только territory. Остальные связи
+# (selectin по умолчанию, в т.ч. у самой территории) не грузим, а случайное
+# обращение к ним падает сразу, а не превращается в скрытые запросы.
+_WITH_TERRITORY = (
+    joinedload(TrademarkRegistration.territory).raiseload("*"),
+    raiseload("*"),
+)
+_WITH_TERRITORY_AND_TRADEMARK = (
+    joinedload(TrademarkRegistration.territory).raiseload("*"),
+    selectinload(TrademarkRegistration.trademark).raiseload("*"),
+    raiseload("*"),
+)
+# Списки отдают только RegistrationResponse: trademark в нём нет, а широкие
+# колонки (external_ids, fee_structure, url-ы) не читаем вовсе
+_REGISTRATION_LIST = (
+    load_only(
+        TrademarkRegistration.id,
+        TrademarkRegistration.trademark_id,
+        TrademarkRegistration.territory_id,
+        TrademarkRegistration.filing_date,
+        TrademarkRegistration.priority_date,
+        TrademarkRegistration.expiration_date,
+        TrademarkRegistration.application_number,
+        TrademarkRegistration.registration_number,
+        TrademarkRegistration.is_national,
+        TrademarkRegistration.is_international,
+        TrademarkRegistration.madrid_registration_number,
+        TrademarkRegistration.comments,
+        TrademarkRegistration.status,
+        TrademarkRegistration.status_detail,
+        TrademarkRegistration.renewal_status,
+        TrademarkRegistration.renewal_filed_date,
+        TrademarkRegistration.renewal_decision_date,
+        TrademarkRegistration.renewal_notes,
+        TrademarkRegistration.last_sync_at,
+        TrademarkRegistration.last_sync_source,
+        TrademarkRegistration.created_at,
+        TrademarkRegistration.updated_at,
+    ),
+    joinedload(TrademarkRegistration.territory)
+    .load_only(
+        Territory.id,
+        Territory.name_en,
+        Territory.name_ru,
+        Territory.iso_code,
+        Territory.region,
+    )
+    .raiseload("*"),
+    raiseload("*"),
+)
 
-@router.get("/{registration_id}", response_model=RegistrationResponse)
-async def get_registration(
-    registration_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> TrademarkRegistration:
-    """Get a single registration by ID."""
-    query = (
-        select(TrademarkRegistration)
-        .where(TrademarkRegistration.id == registration_id)
-        .options(
-            selectinload(TrademarkRegistration.territory),
-        )
+
+# Горячие запросы собираем один раз при импорте: на запрос меняются только
+# значения параметров, а структура (и ключ кэша компиляции) всегда та же
+_SELECT_REGISTRATION = (
+    select(TrademarkRegistration)
+    .where(TrademarkRegistration.id == bindparam("registration_id"))
+    .options(*_WITH_TERRITORY)
+)
+_SELECT_REGISTRATION_WITH_TRADEMARK = (
+    select(TrademarkRegistration)
+    .where(TrademarkRegistration.id == bindparam("registration_id"))
+    .options(*_WITH_TERRITORY_AND_TRADEMARK)
+)
+_SELECT_EXPIRING = (
+    select(TrademarkRegistration)
+    .where(
+        TrademarkRegistration.renewal_status == RenewalStatus.ACTIVE.value,
+        TrademarkRegistration.expiration_date >= bindparam("today"),
+        TrademarkRegistration.expiration_date <= bindparam("threshold"),
     )
+    .options(*_REGISTRATION_LIST)
+    .order_by(TrademarkRegistration.expiration_date)
+)
+_SELECT_BY_TERRITORY = (
+    select(TrademarkRegistration)
+    .where(TrademarkRegistration.territory_id == bindparam("territory_id"))
+    .options(*_REGISTRATION_LIST)
+    .order_by(TrademarkRegistration.registration_number)
+)
+_SELECT_BY_TERRITORY_AND_STATUS = _SELECT_BY_TERRITORY.where(
+    TrademarkRegistration.status == bindparam("status")
+)
+
 
-    result = await db.execute(query)
+async def _load_registration(
+    db: AsyncSession,
+    registration_id: UUID,
+    *,
+    with_trademark: bool = False,
+) -> TrademarkRegistration:
+    """Load a registration with its territory or raise 404."""
+    query = _SELECT_REGISTRATION_WITH_TRADEMARK if with_trademark else _SELECT_REGISTRATION
+    result = await db.execute(query, {"registration_id": registration_id})
     registration = result.scalar_one_or_none()
 
     if not registration:
@@ -49,84 +126,119 @@ async def get_registration(
     return registration
 
 
+@router.get("/{registration_id}", response_model=RegistrationResponse)
+async def get_registration(
+    registration_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthContext = Depends(get_current_user),
+) -> TrademarkRegistration:
+    """Get a single registration by ID."""
+    return await _load_registration(db, registration_id)
+
+
 @router.patch("/{registration_id}", response_model=RegistrationResponse)
 async def update_registration(
     registration_id: UUID,
     registration_data: RegistrationUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> TrademarkRegistration:
     """Update a registration (admin only)."""
-    query = (
-        select(TrademarkRegistration)
-        .where(TrademarkRegistration.id == registration_id)
-        .options(
-            selectinload(TrademarkRegistration.territory),
+    update_data = {
+        field: getattr(registration_data, field)
+        for field in registration_data.model_fields_set & RegistrationUpdate._UPDATABLE_FIELDS
+    }
+
+    if update_data:
+        # Один UPDATE ... RETURNING вместо SELECT + setattr + flush
+        stmt = (
+            update(TrademarkRegistration)
+            .where(TrademarkRegistration.id == registration_id)
+            .values(**update_data)
+            .returning(TrademarkRegistration.id)
+            .execution_options(synchronize_session=False)
         )
-    )
+        if (await db.execute(stmt)).scalar_one_or_none() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Registration not found",
+            )
 
-    result = await db.execute(query)
-    registration = result.scalar_one_or_none()
+    # Ответу нужна территория и серверный updated_at — читаем строку заново
+    return await _load_registration(db, registration_id)
 
-    if not registration:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Registration not found",
-        )
-
-    update_data = registration_data.model_dump(exclude_unset=True)
 
-    for field, value in update_data.items():
-        setattr(registration, field, value)
-
-    await db.flush()
-    return registration
-
-
-@router.post("/{registration_id}/renewal-filed", response_model=RegistrationResponse)
-async def mark_renewal_filed(
+async def _record_renewal_action(
+    db: AsyncSession,
     registration_id: UUID,
+    action_type: str,
+    new_status: RenewalStatus,
     action_data: RenewalActionCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    user_id: UUID,
+    **registration_values,
 ) -> TrademarkRegistration:
-    """Mark a registration as having renewal filed."""
-    query = (
-        select(TrademarkRegistration)
+    """Set a registration's renewal status and log the action."""
+    # Прежний статус берём из той же строки, что обновляем (под FOR UPDATE),
+    # чтобы не читать регистрацию отдельным запросом через ORM
+    previous = (
+        select(TrademarkRegistration.id, TrademarkRegistration.renewal_status)
         .where(TrademarkRegistration.id == registration_id)
-        .options(
-            selectinload(TrademarkRegistration.territory),
+        .with_for_update()
+        .subquery()
+    )
+    stmt = (
+        update(TrademarkRegistration)
+        .where(TrademarkRegistration.id == previous.c.id)
+        .values(
+            renewal_status=new_status.value,
+            renewal_notes=action_data.notes,
+            **registration_values,
         )
+        .returning(previous.c.renewal_status)
+        .execution_options(synchronize_session=False)
     )
+    result = await db.execute(stmt)
+    row = result.one_or_none()
 
-    result = await db.execute(query)
-    registration = result.scalar_one_or_none()
-
-    if not registration:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Registration not found",
         )
 
     # Create renewal action log
-    renewal_action = RenewalAction(
-        registration_id=registration_id,
-        action_type="renewal_filed",
-        action_date=action_data.action_date,
-        previous_status=registration.renewal_status,
-        new_status=RenewalStatus.RENEWAL_FILED.value,
-        notes=action_data.notes,
-        created_by=current_user.id,
+    await db.execute(
+        insert(RenewalAction).values(
+            registration_id=registration_id,
+            action_type=action_type,
+            action_date=action_data.action_date,
+            previous_status=row.renewal_status,
+            new_status=new_status.value,
+            notes=action_data.notes,
+            created_by=user_id,
+        )
     )
-    db.add(renewal_action)
 
-    # Update registration
-    registration.renewal_status = RenewalStatus.RENEWAL_FILED.value
-    registration.renewal_filed_date = action_data.action_date
-    registration.renewal_notes = action_data.notes
+    return await _load_registration(db, registration_id)
 
-    await db.flush()
-    return registration
+
+@router.post("/{registration_id}/renewal-filed", response_model=RegistrationResponse)
+async def mark_renewal_filed(
+    registration_id: UUID,
+    action_data: RenewalActionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthContext = Depends(get_current_admin_user),
+) -> TrademarkRegistration:
+    """Mark a registration as having renewal filed."""
+    return await _record_renewal_action(
+        db,
+        registration_id,
+        "renewal_filed",
+        RenewalStatus.RENEWAL_FILED,
+        action_data,
+        current_user.id,
+        renewal_filed_date=action_data.action_date,
+    )
 
 
 @router.post("/{registration_id}/not-renewing", response_model=RegistrationResponse)
@@ -134,51 +246,24 @@ async def mark_not_renewing(
     registration_id: UUID,
     action_data: RenewalActionCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> TrademarkRegistration:
     """Mark a registration as decided not to renew."""
-    query = (
-        select(TrademarkRegistration)
-        .where(TrademarkRegistration.id == registration_id)
-        .options(
-            selectinload(TrademarkRegistration.territory),
-        )
-    )
-
-    result = await db.execute(query)
-    registration = result.scalar_one_or_none()
-
-    if not registration:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Registration not found",
-        )
-
-    # Create renewal action log
-    renewal_action = RenewalAction(
-        registration_id=registration_id,
-        action_type="decided_not_renew",
-        action_date=action_data.action_date,
-        previous_status=registration.renewal_status,
-        new_status=RenewalStatus.NOT_RENEWING.value,
-        notes=action_data.notes,
-        created_by=current_user.id,
+    return await _record_renewal_action(
+        db,
+        registration_id,
+        "decided_not_renew",
+        RenewalStatus.NOT_RENEWING,
+        action_data,
+        current_user.id,
+        renewal_decision_date=action_data.action_date,
     )
-    db.add(renewal_action)
-
-    # Update registration
-    registration.renewal_status = RenewalStatus.NOT_RENEWING.value
-    registration.renewal_decision_date = action_data.action_date
-    registration.renewal_notes = action_data.notes
-
-    await db.flush()
-    return registration
 
 
 @router.get("/expiring/list", response_model=List[RegistrationResponse])
 async def list_expiring_registrations(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
     days: int = Query(180, ge=1, le=365, description="Days until expiration"),
 ) -> List[TrademarkRegistration]:
     """List registrations expiring within specified days."""
@@ -187,21 +272,9 @@ async def list_expiring_registrations(
     today = date.today()
     expiration_threshold = today + timedelta(days=days)
 
-    query = (
-        select(TrademarkRegistration)
-        .where(
-            TrademarkRegistration.expiration_date <= expiration_threshold,
-            TrademarkRegistration.expiration_date >= today,
-            TrademarkRegistration.renewal_status == RenewalStatus.ACTIVE.value,
-        )
-        .options(
-            selectinload(TrademarkRegistration.territory),
-            selectinload(TrademarkRegistration.trademark),
-        )
-        .order_by(TrademarkRegistration.expiration_date)
+    result = await db.execute(
+        _SELECT_EXPIRING, {"today": today, "threshold": expiration_threshold}
     )
-
-    result = await db.execute(query)
     return result.scalars().all()
 
 
@@ -209,23 +282,16 @@ async def list_expiring_registrations(
 async def list_registrations_by_territory(
     territory_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
     status_filter: Optional[str] = None,
 ) -> List[TrademarkRegistration]:
     """List all registrations for a territory."""
-    query = (
-        select(TrademarkRegistration)
-        .where(TrademarkRegistration.territory_id == territory_id)
-        .options(
-            selectinload(TrademarkRegistration.territory),
-            selectinload(TrademarkRegistration.trademark),
-        )
-    )
-
     if status_filter:
-        query = query.where(TrademarkRegistration.status == status_filter)
-
-    query = query.order_by(TrademarkRegistration.registration_number)
+        result = await db.execute(
+            _SELECT_BY_TERRITORY_AND_STATUS,
+            {"territory_id": territory_id, "status": status_filter},
+        )
+    else:
+        result = await db.execute(_SELECT_BY_TERRITORY, {"territory_id": territory_id})
 
-    result = await db.execute(query)
     return result.scalars().all()
@@ -1,26 +1,42 @@
 """Reports and export API endpoints."""
 
+import os
 from datetime import date
-from typing import Optional
+from typing import BinaryIO, Optional
 
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
-from app.database import get_db
-from app.models import User
+from app.api.deps import AuthContext, get_current_user
+from app.core.streaming import iter_file_chunks
+from app.database import get_export_db
 from app.schemas.trademark import TrademarkExportFilters
 from app.services.export_service import ExportService
 
 router = APIRouter()
 
 
+def _workbook_response(workbook: BinaryIO) -> StreamingResponse:
+    """Stream an exported workbook file in chunks."""
+    filename = f"trademarks_export_{date.today().isoformat()}.xlsx"
+    size = workbook.seek(0, os.SEEK_END)
+
+    return StreamingResponse(
+        iter_file_chunks(workbook),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(size),
+        },
+    )
+
+
 @router.post("/export/excel")
 async def export_trademarks_excel(
     filters: TrademarkExportFilters,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_export_db),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> StreamingResponse:
     """
     Export trademarks to Excel with filters.
@@ -37,24 +53,14 @@ async def export_trademarks_excel(
     - include_rejected: Include rejected registrations
     """
     export_service = ExportService(db)
-    excel_bytes = await export_service.export_to_excel(filters)
-
-    filename = f"trademarks_export_{date.today().isoformat()}.xlsx"
-
-    return StreamingResponse(
-        iter([excel_bytes]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Length": str(len(excel_bytes)),
-        },
-    )
+    workbook = await export_service.export_to_excel(filters)
+    return _workbook_response(workbook)
 
 
 @router.get("/export/excel")
 async def export_all_trademarks_excel(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_export_db),
+    current_user: AuthContext = Depends(get_current_user),
     include_expired: bool = Query(False),
     include_rejected: bool = Query(False),
 ) -> StreamingResponse:
@@ -65,15 +71,5 @@ async def export_all_trademarks_excel(
     )
 
     export_service = ExportService(db)
-    excel_bytes = await export_service.export_to_excel(filters)
-
-    filename = f"trademarks_export_{date.today().isoformat()}.xlsx"
-
-    return StreamingResponse(
-        iter([excel_bytes]),
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Length": str(len(excel_bytes)),
-        },
-    )
+    workbook = await export_service.export_to_excel(filters)
+    return _workbook_response(workbook)
@@ -1,16 +1,24 @@
 """Sync API endpoints for triggering synchronization with FIPS and WIPO."""
 
-from typing import Optional
+import asyncio
+import base64
+import binascii
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select, func
+from sqlalchemy import exists, select, func, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
-from app.api.deps import get_current_user, get_current_admin_user
-from app.database import get_db
-from app.models import User, SyncLog, TrademarkRegistration
+from app.api.deps import AuthContext, get_current_user, get_current_admin_user
+from app.database import async_session_maker, get_db
+from app.models import SyncLog, TrademarkRegistration
+from app.models.trademark import SYNC_STATS_VIEW
 from app.tasks.sync_tasks import (
     sync_fips_trademarks,
     sync_wipo_trademarks,
@@ -19,6 +27,31 @@ from app.tasks.sync_tasks import (
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Витрина обновляется раз в минуту; старше этого — считаем её заброшенной
+SYNC_STATS_MAX_AGE_SECONDS = 300
+
+# Статистика глобальная и крошечная — общий ключ в Redis на 15 секунд
+SYNC_STATS_CACHE_KEY = "sync:stats"
+SYNC_STATS_CACHE_TTL = 15
+
+
+def _encode_cursor(log: SyncLog) -> str:
+    """Encode a (created_at, id) keyset cursor."""
+    raw = f"{log.created_at.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        created_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(log_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 class SyncResponse(BaseModel):
@@ -39,21 +72,24 @@ class SyncStats(BaseModel):
 
 class SyncLogResponse(BaseModel):
     """Sync log entry."""
-    id: str
-    registration_id: Optional[str]
+    id: UUID
+    registration_id: Optional[UUID]
     source: str
     operation: str
     status: str
     changes_detected: Optional[dict]
     error_message: Optional[str]
     duration_ms: Optional[int]
-    created_at: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
 
 
 @router.post("/fips", response_model=SyncResponse)
 async def trigger_fips_sync(
     limit: int = Query(50, ge=1, le=200),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> SyncResponse:
     """
     Trigger FIPS synchronization for Russian trademarks.
@@ -61,7 +97,8 @@ async def trigger_fips_sync(
     Requires admin privileges.
     Rate limited to 12 requests per minute to FIPS.
     """
-    task = sync_fips_trademarks.delay(limit=limit)
+    # .delay() синхронно публикует в брокер — не блокируем event loop
+    task = await asyncio.to_thread(sync_fips_trademarks.delay, limit=limit)
     return SyncResponse(
         message=f"FIPS sync started for up to {limit} registrations",
         task_id=task.id
@@ -71,7 +108,7 @@ async def trigger_fips_sync(
 @router.post("/wipo", response_model=SyncResponse)
 async def trigger_wipo_sync(
     limit: int = Query(50, ge=1, le=200),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> SyncResponse:
     """
     Trigger WIPO synchronization for international trademarks.
@@ -79,7 +116,7 @@ async def trigger_wipo_sync(
     Requires admin privileges.
     Rate limited to 10 requests per minute to WIPO.
     """
-    task = sync_wipo_trademarks.delay(limit=limit)
+    task = await asyncio.to_thread(sync_wipo_trademarks.delay, limit=limit)
     return SyncResponse(
         message=f"WIPO sync started for up to {limit} registrations",
         task_id=task.id
@@ -88,7 +125,7 @@ async def trigger_wipo_sync(
 
 @router.post("/priority", response_model=SyncResponse)
 async def trigger_priority_sync(
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> SyncResponse:
     """
     Trigger priority sync for registrations expiring within 6 months.
@@ -96,7 +133,7 @@ async def trigger_priority_sync(
     Syncs both FIPS and WIPO sources for priority registrations.
     Requires admin privileges.
     """
-    task = sync_priority_registrations.delay()
+    task = await asyncio.to_thread(sync_priority_registrations.delay)
     return SyncResponse(
         message="Priority sync started for expiring registrations",
         task_id=task.id
@@ -108,7 +145,7 @@ async def trigger_single_sync(
     registration_id: UUID,
     source: str = Query(..., regex="^(fips|wipo)$"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> SyncResponse:
     """
     Trigger sync for a single registration.
@@ -120,80 +157,125 @@ async def trigger_single_sync(
     Requires admin privileges.
     """
     # Verify registration exists
-    query = select(TrademarkRegistration).where(
-        TrademarkRegistration.id == registration_id
+    query = select(
+        exists().where(TrademarkRegistration.id == registration_id)
     )
-    result = await db.execute(query)
-    registration = result.scalar_one_or_none()
-
-    if not registration:
+    if not await db.scalar(query):
         raise HTTPException(status_code=404, detail="Registration not found")
 
-    task = sync_single_registration.delay(str(registration_id), source)
+    task = await asyncio.to_thread(
+        sync_single_registration.delay, str(registration_id), source
+    )
     return SyncResponse(
         message=f"Sync started for registration {registration_id} from {source}",
         task_id=task.id
     )
 
 
+async def _live_sync_stats(db: AsyncSession):
+    """Aggregate sync_logs directly."""
+    # Одна строка агрегатов с FILTER вместо шести отдельных запросов
+    stats_query = select(
+        func.count(SyncLog.id).label("total"),
+        func.count(SyncLog.id).filter(SyncLog.status == "success").label("successful"),
+        func.count(SyncLog.id).filter(SyncLog.status == "failed").label("failed"),
+        func.count(SyncLog.id).filter(SyncLog.source == "fips").label("fips"),
+        func.count(SyncLog.id).filter(SyncLog.source == "wipo").label("wipo"),
+        func.max(SyncLog.created_at).label("last_sync"),
+    )
+    return (await db.execute(stats_query)).one()
+
+
 @router.get("/stats", response_model=SyncStats)
 async def get_sync_stats(
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> SyncStats:
     """Get synchronization statistics."""
-    # Total syncs
-    total_query = select(func.count(SyncLog.id))
-    total_result = await db.execute(total_query)
-    total = total_result.scalar() or 0
-
-    # Successful syncs
-    success_query = select(func.count(SyncLog.id)).where(SyncLog.status == "success")
-    success_result = await db.execute(success_query)
-    successful = success_result.scalar() or 0
-
-    # Failed syncs
-    failed_query = select(func.count(SyncLog.id)).where(SyncLog.status == "failed")
-    failed_result = await db.execute(failed_query)
-    failed = failed_result.scalar() or 0
-
-    # FIPS syncs
-    fips_query = select(func.count(SyncLog.id)).where(SyncLog.source == "fips")
-    fips_result = await db.execute(fips_query)
-    fips = fips_result.scalar() or 0
-
-    # WIPO syncs
-    wipo_query = select(func.count(SyncLog.id)).where(SyncLog.source == "wipo")
-    wipo_result = await db.execute(wipo_query)
-    wipo = wipo_result.scalar() or 0
-
-    # Last sync
-    last_query = select(SyncLog.created_at).order_by(SyncLog.created_at.desc()).limit(1)
-    last_result = await db.execute(last_query)
-    last_sync = last_result.scalar()
-
-    return SyncStats(
-        total_syncs=total,
-        successful_syncs=successful,
-        failed_syncs=failed,
-        fips_syncs=fips,
-        wipo_syncs=wipo,
-        last_sync_at=last_sync.isoformat() if last_sync else None,
+    # Redis есть только в основном развёртывании; сбой кэша не ломает ответ
+    redis = getattr(request.app.state, "redis", None)
+    if redis is not None:
+        try:
+            cached = await redis.get(SYNC_STATS_CACHE_KEY)
+        except Exception:
+            logger.warning("Sync stats cache read failed", exc_info=True)
+            cached = None
+        if cached:
+            return SyncStats.model_validate_json(cached)
+
+    row = (
+        await db.execute(
+            text(
+                "SELECT total, successful, failed, fips, wipo, last_sync "
+                f"FROM {SYNC_STATS_VIEW} "
+                "WHERE refreshed_at > now() - make_interval(secs => :max_age)"
+            ),
+            {"max_age": SYNC_STATS_MAX_AGE_SECONDS},
+        )
+    ).one_or_none()
+
+    # Витрину никто не обновляет (нет Celery beat, как на Render/Fly.io) —
+    # считаем по таблице, чтобы не отдавать устаревшие цифры
+    if row is None:
+        row = await _live_sync_stats(db)
+
+    stats = SyncStats(
+        total_syncs=row.total,
+        successful_syncs=row.successful,
+        failed_syncs=row.failed,
+        fips_syncs=row.fips,
+        wipo_syncs=row.wipo,
+        last_sync_at=row.last_sync.isoformat() if row.last_sync else None,
     )
 
+    if redis is not None:
+        try:
+            await redis.set(
+                SYNC_STATS_CACHE_KEY, stats.model_dump_json(), ex=SYNC_STATS_CACHE_TTL
+            )
+        except Exception:
+            logger.warning("Sync stats cache write failed", exc_info=True)
+
+    return stats
+
+
+async def _stream_sync_logs(query) -> AsyncIterator[bytes]:
+    """Yield sync logs as NDJSON lines straight from a server-side cursor."""
+    # Сессия запроса закрывается до отправки тела, поэтому открываем свою
+    async with async_session_maker() as session:
+        logs = await session.stream_scalars(query)
+        async for log in logs:
+            yield SyncLogResponse.model_validate(log).model_dump_json().encode() + b"\n"
+
 
 @router.get("/logs", response_model=list[SyncLogResponse])
 async def get_sync_logs(
+    response: Response,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    stream: bool = Query(False, description="Return NDJSON, one log per line"),
     source: Optional[str] = Query(None, regex="^(fips|wipo|system)$"),
     status: Optional[str] = Query(None, regex="^(success|failed|completed)$"),
     registration_id: Optional[UUID] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> list[SyncLogResponse]:
-    """Get sync operation logs."""
-    query = select(SyncLog).order_by(SyncLog.created_at.desc())
+    current_user: AuthContext = Depends(get_current_user),
+) -> list[SyncLog]:
+    """
+    Get sync operation logs, newest first.
+
+    Pages are keyset-based: pass the X-Next-Cursor header of a page as
+    `cursor` to get the next one. `offset` is kept for old clients and is
+    ignored when a cursor is given. With `stream=true` the page is sent as
+    NDJSON while it is read (no X-Next-Cursor; use the last line instead).
+    """
+    # Ответ строится из колонок лога: связь registration (selectin) не нужна
+    query = (
+        select(SyncLog)
+        .options(raiseload("*"))
+        .order_by(SyncLog.created_at.desc(), SyncLog.id.desc())
+    )
 
     if source:
         query = query.where(SyncLog.source == source)
@@ -202,22 +284,24 @@ async def get_sync_logs(
     if registration_id:
         query = query.where(SyncLog.registration_id == registration_id)
 
-    query = query.offset(offset).limit(limit)
+    if cursor:
+        query = query.where(
+            tuple_(SyncLog.created_at, SyncLog.id) < tuple_(*_decode_cursor(cursor))
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    query = query.limit(limit)
+
+    if stream:
+        return StreamingResponse(
+            _stream_sync_logs(query), media_type="application/x-ndjson"
+        )
 
     result = await db.execute(query)
     logs = result.scalars().all()
 
-    return [
-        SyncLogResponse(
-            id=str(log.id),
-            registration_id=str(log.registration_id) if log.registration_id else None,
-            source=log.source,
-            operation=log.operation,
-            status=log.status,
-            changes_detected=log.changes_detected,
-            error_message=log.error_message,
-            duration_ms=log.duration_ms,
-            created_at=log.created_at.isoformat(),
-        )
-        for log in logs
-    ]
+    if len(logs) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(logs[-1])
+
+    return logs
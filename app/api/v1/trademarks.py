@@ -1,16 +1,19 @@
 """Trademark API endpoints."""
 
-from typing import List, Optional
+import base64
+import binascii
+from typing import List, Optional, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import Select, func, insert, select, or_, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 
-from app.api.deps import get_current_user, get_current_admin_user
+from app.api.deps import AuthContext, get_current_user, get_current_admin_user
+from app.core.text import LIKE_ESCAPE, contains_pattern
 from app.database import get_db
-from app.models import User, Trademark, TrademarkClass, TrademarkRegistration, RightsHolder, Territory
+from app.models import Trademark, TrademarkClass, TrademarkRegistration, RightsHolder, Territory
 from app.schemas.trademark import (
     TrademarkCreate,
     TrademarkUpdate,
@@ -22,110 +25,54 @@ from app.schemas.trademark import (
 
 router = APIRouter()
 
-# ICGS (Nice Classification) directory with keywords for search
-ICGS_DIRECTORY = {
-    1: "химические продукты, удобрения, клеи, chemical",
-    2: "краски, лаки, покрытия, paints",
-    3: "косметика, парфюмерия, мыло, шампунь, зубная паста, cosmetics, perfume, soap",
-    4: "масла, смазки, топливо, свечи, oils, fuels",
-    5: "фармацевтика, лекарства, медицинские препараты, витамины, pharmaceutical, medicines",
-    6: "металлы, металлоизделия, скобяные изделия, metals",
-    7: "машины, станки, двигатели, machines, motors",
-    8: "ручные инструменты, ножи, бритвы, tools, knives",
-    9: "электроника, компьютеры, телефоны, программы, приложения, electronics, computers, software, apps",
-    10: "медицинское оборудование, протезы, medical equipment",
-    11: "освещение, отопление, кондиционеры, сантехника, lighting, heating",
-    12: "транспорт, автомобили, велосипеды, vehicles, cars, bicycles",
-    13: "оружие, боеприпасы, фейерверки, weapons, fireworks",
-    14: "ювелирные изделия, часы, драгоценности, jewelry, watches",
-    15: "музыкальные инструменты, musical instruments",
-    16: "бумага, канцтовары, типография, paper, stationery, printing",
-    17: "резина, пластик, изоляционные материалы, rubber, plastic",
-    18: "кожа, сумки, чемоданы, зонты, leather, bags, luggage, umbrellas",
-    19: "строительные материалы, стекло, бетон, building materials",
-    20: "мебель, зеркала, рамки, furniture, mirrors",
-    21: "посуда, кухонная утварь, щетки, kitchenware, brushes",
-    22: "веревки, канаты, палатки, мешки, ropes, tents, bags",
-    23: "пряжа, нити, yarns, threads",
-    24: "ткани, текстиль, постельное белье, textiles, fabrics, bed linen",
-    25: "одежда, обувь, головные уборы, clothing, footwear, shoes, headwear, fashion",
-    26: "кружева, ленты, пуговицы, молнии, lace, ribbons, buttons, zippers",
-    27: "ковры, коврики, обои, carpets, rugs, wallpaper",
-    28: "игры, игрушки, спортивные товары, games, toys, sports",
-    29: "мясо, рыба, молочные продукты, консервы, meat, fish, dairy, canned food",
-    30: "кофе, чай, какао, хлеб, кондитерские изделия, шоколад, coffee, tea, bread, confectionery, chocolate",
-    31: "сельхозпродукция, фрукты, овощи, семена, корма, agricultural, fruits, vegetables, seeds",
-    32: "пиво, напитки безалкогольные, вода, соки, beer, soft drinks, water, juices",
-    33: "алкогольные напитки, вино, водка, коньяк, alcoholic beverages, wine, vodka",
-    34: "табак, сигареты, спички, tobacco, cigarettes",
-    35: "реклама, маркетинг, бизнес, торговля, advertising, marketing, business, retail",
-    36: "страхование, финансы, банковское дело, недвижимость, insurance, finance, banking, real estate",
-    37: "строительство, ремонт, установка, construction, repair, installation",
-    38: "телекоммуникации, связь, интернет, telecommunications, internet",
-    39: "транспортировка, логистика, доставка, путешествия, transportation, logistics, delivery, travel",
-    40: "обработка материалов, printing, processing",
-    41: "образование, развлечения, спорт, культура, education, entertainment, sports, culture",
-    42: "научные исследования, IT услуги, разработка ПО, дизайн, research, IT services, software development, design",
-    43: "рестораны, отели, кафе, общепит, restaurants, hotels, catering",
-    44: "медицинские услуги, салоны красоты, ветеринария, medical services, beauty salons, veterinary",
-    45: "юридические услуги, охрана, legal services, security",
-}
-
-
-def get_icgs_classes_by_keyword(keyword: str) -> List[int]:
-    """Find ICGS classes matching a keyword."""
-    keyword_lower = keyword.lower()
-    matching = []
-    for class_num, description in ICGS_DIRECTORY.items():
-        if keyword_lower in description.lower():
-            matching.append(class_num)
-    return matching
+# Ровно то, что сериализует TrademarkResponse. У вложенных моделей свои
+# selectin-связи (territory.registrations и т.п.) — их глушим raiseload,
+# чтобы обращение вне этого списка падало сразу, а не грузило пол-базы.
+_TRADEMARK_EAGER_OPTS = (
+    # Many-to-one: LEFT JOIN в том же запросе, без отдельного IN-запроса;
+    # один-ко-многим остаются selectin, чтобы не размножать строки
+    joinedload(Trademark.rights_holder).raiseload("*"),
+    selectinload(Trademark.classes).raiseload("*"),
+    selectinload(Trademark.registrations).options(
+        joinedload(TrademarkRegistration.territory).raiseload("*"),
+        raiseload("*"),
+    ),
+    raiseload("*"),
+)
 
 
-@router.get("", response_model=TrademarkListResponse)
-async def list_trademarks(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    search: Optional[str] = None,
-    goods_search: Optional[str] = Query(None, description="Поиск по товарам/услугам (например: обувь, косметика)"),
-    rights_holder_id: Optional[UUID] = None,
-    territory_id: Optional[int] = None,
-    icgs_class: Optional[int] = None,
-    status: Optional[str] = None,
-    renewal_status: Optional[str] = None,
-) -> TrademarkListResponse:
-    """List trademarks with filtering and pagination."""
-    # Base query
-    query = select(Trademark).options(
-        selectinload(Trademark.rights_holder),
-        selectinload(Trademark.classes),
-        selectinload(Trademark.registrations).selectinload(TrademarkRegistration.territory),
-    )
-
-    # Track if we already joined TrademarkClass
+def _apply_trademark_filters(
+    query: Select,
+    *,
+    search: Optional[str],
+    goods_search: Optional[str],
+    rights_holder_id: Optional[UUID],
+    territory_id: Optional[int],
+    icgs_class: Optional[int],
+    status: Optional[str],
+    renewal_status: Optional[str],
+) -> Tuple[Select, bool]:
+    """Apply list filters; also report whether a to-many join was added."""
+    # Track if we already joined TrademarkClass / TrademarkRegistration
     joined_class = False
+    joined_registration = False
 
-    # Apply filters
+    # Шаблон уходит bind-параметром: текст SQL не зависит от ввода и
+    # кэшируется; % и _ из поиска экранируются и ищутся буквально
     if search:
-        query = query.where(Trademark.name.ilike(f"%{search}%"))
+        query = query.where(
+            Trademark.name.ilike(contains_pattern(search), escape=LIKE_ESCAPE)
+        )
 
-    # Search by goods/services description or by ICGS class names
+    # Ключевые слова МКТУ и описание товаров лежат в одной колонке
+    # search_text: один предикат под trigram-индексом вместо ветвления
     if goods_search:
-        # Get classes matching the search term from ICGS directory
-        matching_classes = get_icgs_classes_by_keyword(goods_search)
-        if matching_classes:
-            query = query.join(TrademarkClass).where(
-                TrademarkClass.icgs_class.in_(matching_classes)
-            )
-            joined_class = True
-        else:
-            # Fallback to description search if exists
-            query = query.join(TrademarkClass).where(
-                TrademarkClass.goods_services_description.ilike(f"%{goods_search}%")
+        query = query.join(TrademarkClass).where(
+            TrademarkClass.search_text.ilike(
+                contains_pattern(goods_search), escape=LIKE_ESCAPE
             )
-            joined_class = True
+        )
+        joined_class = True
 
     if rights_holder_id:
         query = query.where(Trademark.rights_holder_id == rights_holder_id)
@@ -134,6 +81,7 @@ async def list_trademarks(
         query = query.join(TrademarkRegistration).where(
             TrademarkRegistration.territory_id == territory_id
         )
+        joined_registration = True
 
     if icgs_class:
         if not joined_class:
@@ -142,53 +90,140 @@ async def list_trademarks(
         query = query.where(TrademarkClass.icgs_class == icgs_class)
 
     if status:
-        if not territory_id:
+        if not joined_registration:
             query = query.join(TrademarkRegistration)
+            joined_registration = True
         query = query.where(TrademarkRegistration.status == status)
 
     if renewal_status:
-        if not territory_id and not status:
+        if not joined_registration:
             query = query.join(TrademarkRegistration)
+            joined_registration = True
         query = query.where(TrademarkRegistration.renewal_status == renewal_status)
 
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    result = await db.execute(count_query)
-    total = result.scalar()
+    return query, joined_class or joined_registration
+
+
+def _encode_cursor(trademark: Trademark) -> str:
+    """Encode a (name, id) keyset cursor."""
+    raw = f"{trademark.name}|{trademark.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, UUID]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        # В названии может быть "|", id всегда последний
+        name, trademark_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return name, UUID(trademark_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+async def _estimate_trademark_count(db: AsyncSession) -> Optional[int]:
+    """Row estimate for trademarks from planner statistics, if analyzed."""
+    estimate = await db.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'trademarks'::regclass")
+    )
+    # -1: таблицу ещё не анализировали (PostgreSQL 14+)
+    return estimate if estimate is not None and estimate >= 0 else None
+
+
+@router.get("", response_model=TrademarkListResponse)
+async def list_trademarks(
+    db: AsyncSession = Depends(get_db),
+    current_user: AuthContext = Depends(get_current_user),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    search: Optional[str] = None,
+    goods_search: Optional[str] = Query(None, description="Поиск по товарам/услугам (например: обувь, косметика)"),
+    rights_holder_id: Optional[UUID] = None,
+    territory_id: Optional[int] = None,
+    icgs_class: Optional[int] = None,
+    status: Optional[str] = None,
+    renewal_status: Optional[str] = None,
+    include_total: bool = Query(True, description="Считать total/pages (false — для бесконечной прокрутки)"),
+    approximate: bool = Query(False, description="Оценка total по статистике Postgres (только без фильтров)"),
+    after: Optional[str] = Query(None, description="next_cursor из предыдущей страницы"),
+) -> Response:
+    """
+    List trademarks with filtering and pagination.
+
+    Pass `next_cursor` of a page as `after` to get the next one (keyset,
+    same cost at any depth); `page` is kept for old clients and is ignored
+    when `after` is given.
+    """
+    filters = dict(
+        search=search,
+        goods_search=goods_search,
+        rights_holder_id=rights_holder_id,
+        territory_id=territory_id,
+        icgs_class=icgs_class,
+        status=status,
+        renewal_status=renewal_status,
+    )
+
+    # Count total: те же JOIN/WHERE, но без eager-загрузки и подзапроса
+    count_query, joined = _apply_trademark_filters(
+        select(func.count(func.distinct(Trademark.id))).select_from(Trademark),
+        **filters,
+    )
+    total = None
+    if include_total:
+        if approximate and not any(filters.values()):
+            total = await _estimate_trademark_count(db)
+        if total is None:
+            total = (await db.execute(count_query)).scalar()
 
-    # Paginate
-    query = query.offset((page - 1) * page_size).limit(page_size)
-    query = query.order_by(Trademark.name)
+    # Base query
+    query, _ = _apply_trademark_filters(
+        select(Trademark).options(*_TRADEMARK_EAGER_OPTS),
+        **filters,
+    )
+    if joined:
+        # JOIN по классам/регистрациям размножает строки — страница должна
+        # считаться по уникальным знакам, как и total
+        query = query.distinct()
+
+    # Paginate: id делает порядок однозначным при одинаковых названиях
+    if after:
+        query = query.where(
+            tuple_(Trademark.name, Trademark.id) > tuple_(*_decode_cursor(after))
+        )
+    else:
+        query = query.offset((page - 1) * page_size)
+    query = query.order_by(Trademark.name, Trademark.id).limit(page_size)
 
     result = await db.execute(query)
     trademarks = result.scalars().unique().all()
 
-    pages = (total + page_size - 1) // page_size
+    pages = (total + page_size - 1) // page_size if total is not None else None
+    next_cursor = _encode_cursor(trademarks[-1]) if len(trademarks) == page_size else None
 
-    return TrademarkListResponse(
+    payload = TrademarkListResponse(
         items=trademarks,
         total=total,
         page=page,
         page_size=page_size,
         pages=pages,
+        next_cursor=next_cursor,
     )
+    # Модель уже провалидирована из ORM; готовый Response FastAPI не
+    # пересобирает через response_model, а JSON пишет pydantic-core
+    return Response(payload.model_dump_json(), media_type="application/json")
 
 
 @router.get("/{trademark_id}", response_model=TrademarkResponse)
 async def get_trademark(
     trademark_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> Trademark:
     """Get a single trademark by ID."""
     query = (
         select(Trademark)
         .where(Trademark.id == trademark_id)
-        .options(
-            selectinload(Trademark.rights_holder),
-            selectinload(Trademark.classes),
-            selectinload(Trademark.registrations).selectinload(TrademarkRegistration.territory),
-        )
+        .options(*_TRADEMARK_EAGER_OPTS)
     )
 
     result = await db.execute(query)
@@ -207,20 +242,33 @@ async def get_trademark(
 async def create_trademark(
     trademark_data: TrademarkCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> Trademark:
     """Create a new trademark (admin only)."""
     # Validate rights holder
     if trademark_data.rights_holder_id:
         result = await db.execute(
-            select(RightsHolder).where(RightsHolder.id == trademark_data.rights_holder_id)
+            select(RightsHolder.id).where(RightsHolder.id == trademark_data.rights_holder_id)
         )
-        if not result.scalar_one_or_none():
+        if result.scalar_one_or_none() is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Rights holder not found",
             )
 
+    # Validate all territories in one query
+    territory_ids = {reg_data.territory_id for reg_data in trademark_data.registrations}
+    if territory_ids:
+        result = await db.execute(
+            select(Territory.id).where(Territory.id.in_(territory_ids))
+        )
+        missing = territory_ids - set(result.scalars().all())
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Territories not found: {', '.join(map(str, sorted(missing)))}",
+            )
+
     # Create trademark
     trademark = Trademark(
         name=trademark_data.name,
@@ -230,53 +278,41 @@ async def create_trademark(
     db.add(trademark)
     await db.flush()
 
-    # Add classes
-    for class_num in trademark_data.classes:
-        if 1 <= class_num <= 45:
-            tm_class = TrademarkClass(
-                trademark_id=trademark.id,
-                icgs_class=class_num,
-            )
-            db.add(tm_class)
-
-    # Add registrations
-    for reg_data in trademark_data.registrations:
-        # Validate territory
-        result = await db.execute(
-            select(Territory).where(Territory.id == reg_data.territory_id)
-        )
-        if not result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Territory {reg_data.territory_id} not found",
-            )
-
-        registration = TrademarkRegistration(
-            trademark_id=trademark.id,
-            territory_id=reg_data.territory_id,
-            filing_date=reg_data.filing_date,
-            priority_date=reg_data.priority_date,
-            expiration_date=reg_data.expiration_date,
-            application_number=reg_data.application_number,
-            registration_number=reg_data.registration_number,
-            is_national=reg_data.is_national,
-            is_international=reg_data.is_international,
-            madrid_registration_number=reg_data.madrid_registration_number,
-            comments=reg_data.comments,
-        )
-        db.add(registration)
+    # Классы и регистрации — Core executemany (insertmanyvalues: один
+    # многострочный INSERT на таблицу) вместо unit of work по объекту
+    classes = [
+        {"trademark_id": trademark.id, "icgs_class": class_num}
+        for class_num in trademark_data.classes
+        if 1 <= class_num <= 45
+    ]
+    if classes:
+        await db.execute(insert(TrademarkClass), classes)
 
-    await db.flush()
+    registrations = [
+        {
+            "trademark_id": trademark.id,
+            "territory_id": reg_data.territory_id,
+            "filing_date": reg_data.filing_date,
+            "priority_date": reg_data.priority_date,
+            "expiration_date": reg_data.expiration_date,
+            "application_number": reg_data.application_number,
+            "registration_number": reg_data.registration_number,
+            "is_national": reg_data.is_national,
+            "is_international": reg_data.is_international,
+            "madrid_registration_number": reg_data.madrid_registration_number,
+            "comments": reg_data.comments,
+        }
+        for reg_data in trademark_data.registrations
+    ]
+    if registrations:
+        await db.execute(insert(TrademarkRegistration), registrations)
 
     # Reload with relationships
     query = (
         select(Trademark)
         .where(Trademark.id == trademark.id)
-        .options(
-            selectinload(Trademark.rights_holder),
-            selectinload(Trademark.classes),
-            selectinload(Trademark.registrations).selectinload(TrademarkRegistration.territory),
-        )
+        .options(*_TRADEMARK_EAGER_OPTS)
+        .execution_options(populate_existing=True)
     )
     result = await db.execute(query)
     return result.scalar_one()
@@ -287,17 +323,13 @@ async def update_trademark(
     trademark_id: UUID,
     trademark_data: TrademarkUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> Trademark:
     """Update a trademark (admin only)."""
     query = (
         select(Trademark)
         .where(Trademark.id == trademark_id)
-        .options(
-            selectinload(Trademark.rights_holder),
-            selectinload(Trademark.classes),
-            selectinload(Trademark.registrations).selectinload(TrademarkRegistration.territory),
-        )
+        .options(*_TRADEMARK_EAGER_OPTS)
     )
 
     result = await db.execute(query)
@@ -333,7 +365,7 @@ async def update_trademark(
 async def delete_trademark(
     trademark_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthContext = Depends(get_current_admin_user),
 ) -> None:
     """Delete a trademark (admin only)."""
     result = await db.execute(select(Trademark).where(Trademark.id == trademark_id))
@@ -351,14 +383,16 @@ async def delete_trademark(
 @router.get("/rights-holders/list", response_model=List[RightsHolderResponse])
 async def list_rights_holders(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
     search: Optional[str] = None,
 ) -> List[RightsHolder]:
     """List all rights holders."""
     query = select(RightsHolder)
 
     if search:
-        query = query.where(RightsHolder.name.ilike(f"%{search}%"))
+        query = query.where(
+            RightsHolder.name.ilike(contains_pattern(search), escape=LIKE_ESCAPE)
+        )
 
     query = query.order_by(RightsHolder.name)
     result = await db.execute(query)
@@ -368,7 +402,7 @@ async def list_rights_holders(
 @router.get("/classes/list")
 async def list_icgs_classes(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
 ) -> list[dict]:
     """List all used ICGS classes with counts."""
     query = (
@@ -396,7 +430,7 @@ async def list_icgs_classes(
 @router.get("/territories/list", response_model=List[TerritoryResponse])
 async def list_territories(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthContext = Depends(get_current_user),
     region: Optional[str] = None,
 ) -> List[Territory]:
     """List all territories."""
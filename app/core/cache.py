@@ -0,0 +1,15 @@
+"""Shared Redis client for response caching."""
+
+import redis.asyncio as redis
+
+from app.config import settings
+
+
+def create_redis_client() -> redis.Redis:
+    """Create the pooled Redis client; one per application."""
+    return redis.from_url(
+        settings.redis_url,
+        decode_responses=True,
+        socket_connect_timeout=1.0,
+        socket_timeout=1.0,
+    )
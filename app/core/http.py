@@ -0,0 +1,19 @@
+"""Shared outbound HTTP clients."""
+
+import httpx
+
+EGRUL_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def create_egrul_client() -> httpx.AsyncClient:
+    """Create the pooled client for egrul.nalog.ru; one per application."""
+    return httpx.AsyncClient(
+        base_url="https://egrul.nalog.ru",
+        timeout=httpx.Timeout(15.0, connect=3.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        headers={
+            "User-Agent": EGRUL_USER_AGENT,
+            "Accept": "application/json, text/javascript, */*; q=0.01",
+            "X-Requested-With": "XMLHttpRequest",
+        },
+    )
@@ -0,0 +1,73 @@
+"""ICGS (Nice Classification) class keywords used by goods/services search."""
+
+from types import MappingProxyType
+
+# ICGS (Nice Classification) directory with keywords for search (read-only).
+# Изменения требуют миграции: SQL-функция icgs_keywords и сохранённая
+# колонка trademark_classes.search_text строятся из этого словаря.
+ICGS_DIRECTORY = MappingProxyType({
+    1: "химические продукты, удобрения, клеи, chemical",
+    2: "краски, лаки, покрытия, paints",
+    3: "косметика, парфюмерия, мыло, шампунь, зубная паста, cosmetics, perfume, soap",
+    4: "масла, смазки, топливо, свечи, oils, fuels",
+    5: "фармацевтика, лекарства, медицинские препараты, витамины, pharmaceutical, medicines",
+    6: "металлы, металлоизделия, скобяные изделия, metals",
+    7: "машины, станки, двигатели, machines, motors",
+    8: "ручные инструменты, ножи, бритвы, tools, knives",
+    9: "электроника, компьютеры, телефоны, программы, приложения, electronics, computers, software, apps",
+    10: "медицинское оборудование, протезы, medical equipment",
+    11: "освещение, отопление, кондиционеры, сантехника, lighting, heating",
+    12: "транспорт, автомобили, велосипеды, vehicles, cars, bicycles",
+    13: "оружие, боеприпасы, фейерверки, weapons, fireworks",
+    14: "ювелирные изделия, часы, драгоценности, jewelry, watches",
+    15: "музыкальные инструменты, musical instruments",
+    16: "бумага, канцтовары, типография, paper, stationery, printing",
+    17: "резина, пластик, изоляционные материалы, rubber, plastic",
+    18: "кожа, сумки, чемоданы, зонты, leather, bags, luggage, umbrellas",
+    19: "строительные материалы, стекло, бетон, building materials",
+    20: "мебель, зеркала, рамки, furniture, mirrors",
+    21: "посуда, кухонная утварь, щетки, kitchenware, brushes",
+    22: "веревки, канаты, палатки, мешки, ropes, tents, bags",
+    23: "пряжа, нити, yarns, threads",
+    24: "ткани, текстиль, постельное белье, textiles, fabrics, bed linen",
+    25: "одежда, обувь, головные уборы, clothing, footwear, shoes, headwear, fashion",
+    26: "кружева, ленты, пуговицы, молнии, lace, ribbons, buttons, zippers",
+    27: "ковры, коврики, обои, carpets, rugs, wallpaper",
+    28: "игры, игрушки, спортивные товары, games, toys, sports",
+    29: "мясо, рыба, молочные продукты, консервы, meat, fish, dairy, canned food",
+    30: "кофе, чай, какао, хлеб, кондитерские изделия, шоколад, coffee, tea, bread, confectionery, chocolate",
+    31: "сельхозпродукция, фрукты, овощи, семена, корма, agricultural, fruits, vegetables, seeds",
+    32: "пиво, напитки безалкогольные, вода, соки, beer, soft drinks, water, juices",
+    33: "алкогольные напитки, вино, водка, коньяк, alcoholic beverages, wine, vodka",
+    34: "табак, сигареты, спички, tobacco, cigarettes",
+    35: "реклама, маркетинг, бизнес, торговля, advertising, marketing, business, retail",
+    36: "страхование, финансы, банковское дело, недвижимость, insurance, finance, banking, real estate",
+    37: "строительство, ремонт, установка, construction, repair, installation",
+    38: "телекоммуникации, связь, интернет, telecommunications, internet",
+    39: "транспортировка, логистика, доставка, путешествия, transportation, logistics, delivery, travel",
+    40: "обработка материалов, printing, processing",
+    41: "образование, развлечения, спорт, культура, education, entertainment, sports, culture",
+    42: "научные исследования, IT услуги, разработка ПО, дизайн, research, IT services, software development, design",
+    43: "рестораны, отели, кафе, общепит, restaurants, hotels, catering",
+    44: "медицинские услуги, салоны красоты, ветеринария, medical services, beauty salons, veterinary",
+    45: "юридические услуги, охрана, legal services, security",
+})
+
+ICGS_KEYWORDS_FUNCTION = "icgs_keywords"
+
+
+def icgs_keywords_function_sql() -> str:
+    """CREATE FUNCTION statement mapping a class number to its keywords."""
+    cases = "\n".join(
+        "        WHEN {} THEN '{}'".format(class_num, keywords.replace("'", "''"))
+        for class_num, keywords in ICGS_DIRECTORY.items()
+    )
+    return (
+        f"CREATE OR REPLACE FUNCTION {ICGS_KEYWORDS_FUNCTION}(icgs_class integer)\n"
+        "RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$\n"
+        "    SELECT CASE icgs_class\n"
+        f"{cases}\n"
+        "        ELSE ''\n"
+        "    END\n"
+        "$$"
+    )
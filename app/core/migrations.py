@@ -0,0 +1,48 @@
+"""Helpers shared by Alembic migration scripts."""
+
+from typing import Any, Iterable, Sequence
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.util import await_only
+
+
+def copy_seed(table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+    """
+    Bulk-load seed rows into a table with COPY ... FROM STDIN.
+
+    COPY streams all rows in one protocol exchange instead of one INSERT
+    per row. With asyncpg this goes through copy_records_to_table on the
+    migration's own connection, so it stays inside the migration
+    transaction. Offline (--sql) mode and other drivers fall back to a
+    multi-row INSERT.
+
+    Returns the number of rows loaded.
+    """
+    records = [tuple(row) for row in rows]
+    if not records:
+        return 0
+
+    if context.is_offline_mode():
+        driver_connection = None
+    else:
+        bind = op.get_bind()
+        driver_connection = bind.connection.driver_connection
+
+    if driver_connection is None or not hasattr(driver_connection, "copy_records_to_table"):
+        seed_table = sa.table(table, *(sa.column(name) for name in columns))
+        op.bulk_insert(seed_table, [dict(zip(columns, record)) for record in records])
+        return len(records)
+
+    # Сид можно перезалить, ждать fsync каждой страницы не нужно
+    bind.exec_driver_sql("SET LOCAL synchronous_commit = off")
+    # Миграции выполняются внутри run_sync(), поэтому ждём корутину через
+    # greenlet-мост SQLAlchemy, как это делает сам asyncpg-диалект
+    await_only(
+        driver_connection.copy_records_to_table(
+            table,
+            records=records,
+            columns=list(columns),
+        )
+    )
+    return len(records)
@@ -1,25 +1,48 @@
 """Security utilities for authentication and authorization."""
 
+import asyncio
+import re
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
 from uuid import UUID
 
-from jose import JWTError, jwt
+import jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from app.config import settings
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing: new hashes are argon2id, existing bcrypt hashes still verify
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=64 * 1024,
+    argon2__parallelism=1,
+)
+
+# Настройки JWT читаем один раз: decode_token вызывается на каждом запросе
+_JWT_SECRET = settings.jwt_secret_key
+_JWT_ALGORITHM = settings.jwt_algorithm
+_JWT_ALGORITHMS = [_JWT_ALGORITHM]
+_JWT_DECODE_OPTIONS = {"require": ["exp", "sub", "type"]}
+_ACCESS_TOKEN_TTL = timedelta(minutes=settings.access_token_expire_minutes)
+_REFRESH_TOKEN_TTL = timedelta(days=settings.refresh_token_expire_days)
+
+# Наши токены — три base64url-сегмента и пара сотен байт; всё прочее
+# отбрасываем до разбора JSON и проверки подписи
+_JWT_MAX_LENGTH = 4096
+_is_jwt_shaped = re.compile(r"[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+").fullmatch
 
 
 class TokenPayload(BaseModel):
     """JWT token payload."""
 
     sub: str  # User ID
-    exp: datetime
+    exp: int  # Unix timestamp
     type: str  # "access" or "refresh"
+    role: Optional[str] = None  # only in access tokens
 
 
 class TokenPair(BaseModel):
@@ -35,87 +58,105 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in a worker thread, keeping the event loop free."""
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password off the event loop; return a new hash if the old one is deprecated."""
+    return await asyncio.to_thread(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
 
 
-def create_access_token(user_id: UUID) -> str:
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in a worker thread, keeping the event loop free."""
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+
+def create_access_token(user_id: UUID, role: Optional[str] = None) -> str:
     """Create an access token for a user."""
-    expire = datetime.now(timezone.utc) + timedelta(
-        minutes=settings.access_token_expire_minutes
-    )
+    expire = datetime.now(timezone.utc) + _ACCESS_TOKEN_TTL
     payload = {
         "sub": str(user_id),
         "exp": expire,
         "type": "access",
     }
-    return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    if role is not None:
+        payload["role"] = role
+    return jwt.encode(payload, _JWT_SECRET, algorithm=_JWT_ALGORITHM)
 
 
 def create_refresh_token(user_id: UUID) -> str:
     """Create a refresh token for a user."""
-    expire = datetime.now(timezone.utc) + timedelta(
-        days=settings.refresh_token_expire_days
-    )
+    expire = datetime.now(timezone.utc) + _REFRESH_TOKEN_TTL
     payload = {
         "sub": str(user_id),
         "exp": expire,
         "type": "refresh",
     }
-    return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+    return jwt.encode(payload, _JWT_SECRET, algorithm=_JWT_ALGORITHM)
 
 
-def create_token_pair(user_id: UUID) -> TokenPair:
+def create_token_pair(user_id: UUID, role: Optional[str] = None) -> TokenPair:
     """Create access and refresh token pair."""
     return TokenPair(
-        access_token=create_access_token(user_id),
+        access_token=create_access_token(user_id, role),
         refresh_token=create_refresh_token(user_id),
     )
 
 
-def decode_token(token: str) -> Optional[TokenPayload]:
-    """Decode and validate a JWT token."""
+def _decode_raw(token: str) -> Optional[dict]:
+    """Decode and validate a JWT token into its raw claims."""
+    if not token or len(token) > _JWT_MAX_LENGTH or not _is_jwt_shaped(token):
+        return None
     try:
-        payload = jwt.decode(
-            token,
-            settings.jwt_secret_key,
-            algorithms=[settings.jwt_algorithm],
+        # PyJWT сам проверяет подпись, exp и наличие обязательных claims
+        return jwt.decode(
+            token, _JWT_SECRET, algorithms=_JWT_ALGORITHMS, options=_JWT_DECODE_OPTIONS
         )
-        return TokenPayload(
-            sub=payload["sub"],
-            exp=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
-            type=payload["type"],
-        )
-    except JWTError:
+    except jwt.PyJWTError:
         return None
 
 
-def verify_access_token(token: str) -> Optional[UUID]:
-    """Verify an access token and return user ID."""
-    payload = decode_token(token)
+def decode_token(token: str) -> Optional[TokenPayload]:
+    """Decode and validate a JWT token."""
+    payload = _decode_raw(token)
     if payload is None:
         return None
-    if payload.type != "access":
-        return None
-    if payload.exp < datetime.now(timezone.utc):
+    return TokenPayload(
+        sub=payload["sub"],
+        exp=payload["exp"],
+        type=payload["type"],
+        role=payload.get("role"),
+    )
+
+
+# verify_* вызываются на каждом запросе: читаем claims из dict напрямую,
+# без построения TokenPayload
+def verify_access_token(token: str) -> Optional[Tuple[UUID, Optional[str], int]]:
+    """Verify an access token and return user ID, role claim and expiry timestamp."""
+    payload = _decode_raw(token)
+    if payload is None or payload["type"] != "access":
         return None
     try:
-        return UUID(payload.sub)
-    except ValueError:
+        return UUID(payload["sub"]), payload.get("role"), payload["exp"]
+    except (TypeError, ValueError):
         return None
 
 
 def verify_refresh_token(token: str) -> Optional[UUID]:
     """Verify a refresh token and return user ID."""
-    payload = decode_token(token)
-    if payload is None:
-        return None
-    if payload.type != "refresh":
-        return None
-    if payload.exp < datetime.now(timezone.utc):
+    payload = _decode_raw(token)
+    if payload is None or payload["type"] != "refresh":
         return None
     try:
-        return UUID(payload.sub)
-    except ValueError:
+        return UUID(payload["sub"])
+    except (TypeError, ValueError):
         return None
@@ -0,0 +1,13 @@
+"""Helpers for streaming file-backed responses."""
+
+from typing import BinaryIO, Iterator
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def iter_file_chunks(file: BinaryIO, chunk_size: int = FILE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a file in fixed-size chunks and close it when exhausted."""
+    with file:
+        file.seek(0)
+        while chunk := file.read(chunk_size):
+            yield chunk
@@ -0,0 +1,28 @@
+"""Text normalization shared by models, importers and scripts."""
+
+import re
+import unicodedata
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison (NFKC, collapsed whitespace, lowercase)."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = _WS_RE.sub(" ", text)
+    return text.strip().lower()
+
+
+LIKE_ESCAPE = "\\"
+
+
+def contains_pattern(value: str) -> str:
+    """Build a LIKE/ILIKE substring pattern with wildcards in value escaped."""
+    escaped = (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+    return f"%{escaped}%"
@@ -18,8 +18,12 @@ engine = create_async_engine(
     settings.database_url,
     echo=settings.database_echo,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.database_pool_size,
+    max_overflow=settings.database_max_overflow,
+    pool_recycle=settings.database_pool_recycle,
+    connect_args={
+        "prepared_statement_cache_size": settings.database_statement_cache_size,
+    },
 )
 
 async_session_maker = async_sessionmaker(
@@ -30,6 +34,28 @@ async_session_maker = async_sessionmaker(
     autoflush=False,
 )
 
+# Отдельный пул только для выгрузок; транзакции read-only на уровне сервера
+export_engine = create_async_engine(
+    settings.export_database_url or settings.database_url,
+    echo=settings.database_echo,
+    pool_pre_ping=True,
+    pool_size=2,
+    max_overflow=2,
+    pool_timeout=60,
+    connect_args={
+        "prepared_statement_cache_size": settings.database_statement_cache_size,
+        "server_settings": {"default_transaction_read_only": "on"},
+    },
+)
+
+export_session_maker = async_sessionmaker(
+    export_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting database sessions."""
@@ -44,6 +70,12 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_export_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only export sessions."""
+    async with export_session_maker() as session:
+        yield session
+
+
 async def init_db() -> None:
     """Initialize database tables."""
     async with engine.begin() as conn:
@@ -1,93 +1,26 @@
 """Email sender using SMTP."""
 
+import asyncio
 import logging
-import smtplib
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from html import escape
+from string import Template
 from typing import List, Optional
 
+import aiosmtplib
+
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Сколько держим простаивающее SMTP-соединение для следующих писем
+SMTP_IDLE_TIMEOUT = 100.0
 
-class EmailSender:
-    """Send emails via SMTP."""
-
-    def __init__(self):
-        self.smtp_host = getattr(settings, 'smtp_host', 'smtp.gmail.com')
-        self.smtp_port = getattr(settings, 'smtp_port', 587)
-        self.smtp_user = getattr(settings, 'smtp_user', None)
-        self.smtp_password = getattr(settings, 'smtp_password', None)
-        self.from_email = getattr(settings, 'email_from', 'trademarks@example.com')
-        self.from_name = getattr(settings, 'email_from_name', 'Trademark System')
-
-    def send_email(
-        self,
-        to_emails: List[str],
-        subject: str,
-        html_body: str,
-        text_body: Optional[str] = None,
-    ) -> bool:
-        """Send an email.
-
-        Args:
-            to_emails: List of recipient email addresses
-            subject: Email subject
-            html_body: HTML content of the email
-            text_body: Plain text alternative (optional)
-
-        Returns:
-            True if sent successfully, False otherwise
-        """
-        if not self.smtp_user or not self.smtp_password:
-            logger.warning("SMTP credentials not configured, skipping email")
-            return False
-
-        try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
-            msg['To'] = ', '.join(to_emails)
-
-            # Add text part
-            if text_body:
-                part1 = MIMEText(text_body, 'plain', 'utf-8')
-                msg.attach(part1)
-
-            # Add HTML part
-            part2 = MIMEText(html_body, 'html', 'utf-8')
-            msg.attach(part2)
-
-            # Send
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.sendmail(self.from_email, to_emails, msg.as_string())
-
-            logger.info(f"Email sent to {to_emails}: {subject}")
-            return True
-
-        except Exception as e:
-            logger.error(f"Failed to send email: {e}")
-            return False
-
-    def send_expiration_notification(
-        self,
-        to_emails: List[str],
-        trademark_name: str,
-        territory: str,
-        registration_number: str,
-        expiration_date: str,
-        days_left: int,
-    ) -> bool:
-        """Send trademark expiration notification."""
-        subject = f"[Важно] Истекает срок действия товарного знака: {trademark_name}"
-
-        urgency_color = "#d32f2f" if days_left <= 30 else "#ef6c00" if days_left <= 90 else "#1976d2"
-
-        html_body = f"""
+# Шаблоны писем разбираются один раз при импорте; значения подставляются
+# уже экранированными (в HTML) — см. send_*_notification
+_EXPIRATION_HTML = Template("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -95,38 +28,38 @@ class EmailSender:
 </head>
 <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
     <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-        <h2 style="color: {urgency_color};">Уведомление об истечении срока</h2>
+        <h2 style="color: ${urgency_color};">Уведомление об истечении срока</h2>
 
         <p>Уважаемый пользователь,</p>
 
-        <p>Срок действия товарного знака <strong>{trademark_name}</strong> истекает через
-        <span style="color: {urgency_color}; font-weight: bold;">{days_left} дней</span>.</p>
+        <p>Срок действия товарного знака <strong>${trademark_name}</strong> истекает через
+        <span style="color: ${urgency_color}; font-weight: bold;">${days_left} дней</span>.</p>
 
         <table style="width: 100%; border-collapse: collapse; margin: 20px 0;">
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee; width: 40%;">
                     <strong>Товарный знак:</strong>
                 </td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{trademark_name}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #eee;">${trademark_name}</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
                     <strong>Территория:</strong>
                 </td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{territory}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #eee;">${territory}</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
                     <strong>Номер регистрации:</strong>
                 </td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{registration_number}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #eee;">${registration_number}</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
                     <strong>Срок действия до:</strong>
                 </td>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
-                    <span style="color: {urgency_color}; font-weight: bold;">{expiration_date}</span>
+                    <span style="color: ${urgency_color}; font-weight: bold;">${expiration_date}</span>
                 </td>
             </tr>
         </table>
@@ -147,16 +80,16 @@ class EmailSender:
     </div>
 </body>
 </html>
-"""
+""")
 
-        text_body = f"""
+_EXPIRATION_TEXT = Template("""
 Уведомление об истечении срока действия товарного знака
 
-Товарный знак: {trademark_name}
-Территория: {territory}
-Номер регистрации: {registration_number}
-Срок действия до: {expiration_date}
-Осталось дней: {days_left}
+Товарный знак: ${trademark_name}
+Территория: ${territory}
+Номер регистрации: ${registration_number}
+Срок действия до: ${expiration_date}
+Осталось дней: ${days_left}
 
 Рекомендуемые действия:
 - Если планируется продление — подайте заявку на продление заблаговременно
@@ -164,23 +97,9 @@ class EmailSender:
 
 ---
 Это автоматическое уведомление от системы управления товарными знаками.
-"""
-
-        return self.send_email(to_emails, subject, html_body, text_body)
+""")
 
-    def send_status_change_notification(
-        self,
-        to_emails: List[str],
-        trademark_name: str,
-        territory: str,
-        registration_number: str,
-        old_status: str,
-        new_status: str,
-    ) -> bool:
-        """Send notification about status change."""
-        subject = f"Изменение статуса товарного знака: {trademark_name}"
-
-        html_body = f"""
+_STATUS_CHANGE_HTML = Template("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -190,39 +109,39 @@ class EmailSender:
     <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
         <h2 style="color: #1976d2;">Изменение статуса регистрации</h2>
 
-        <p>Статус товарного знака <strong>{trademark_name}</strong> был изменён.</p>
+        <p>Статус товарного знака <strong>${trademark_name}</strong> был изменён.</p>
 
         <table style="width: 100%; border-collapse: collapse; margin: 20px 0;">
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee; width: 40%;">
                     <strong>Товарный знак:</strong>
                 </td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{trademark_name}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #eee;">${trademark_name}</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
                     <strong>Территория:</strong>
                 </td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{territory}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #eee;">${territory}</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
                     <strong>Номер регистрации:</strong>
                 </td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{registration_number}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #eee;">${registration_number}</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
                     <strong>Предыдущий статус:</strong>
                 </td>
-                <td style="padding: 10px; border-bottom: 1px solid #eee;">{old_status}</td>
+                <td style="padding: 10px; border-bottom: 1px solid #eee;">${old_status}</td>
             </tr>
             <tr>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
                     <strong>Новый статус:</strong>
                 </td>
                 <td style="padding: 10px; border-bottom: 1px solid #eee;">
-                    <span style="color: #1976d2; font-weight: bold;">{new_status}</span>
+                    <span style="color: #1976d2; font-weight: bold;">${new_status}</span>
                 </td>
             </tr>
         </table>
@@ -233,19 +152,206 @@ class EmailSender:
     </div>
 </body>
 </html>
-"""
+""")
 
-        text_body = f"""
+_STATUS_CHANGE_TEXT = Template("""
 Изменение статуса товарного знака
 
-Товарный знак: {trademark_name}
-Территория: {territory}
-Номер регистрации: {registration_number}
-Предыдущий статус: {old_status}
-Новый статус: {new_status}
+Товарный знак: ${trademark_name}
+Территория: ${territory}
+Номер регистрации: ${registration_number}
+Предыдущий статус: ${old_status}
+Новый статус: ${new_status}
 
 ---
 Это автоматическое уведомление от системы управления товарными знаками.
-"""
+""")
+
+
+def _build_mime(
+    subject: str,
+    from_header: str,
+    to_emails: List[str],
+    html_body: str,
+    text_body: Optional[str] = None,
+) -> MIMEMultipart:
+    """Assemble a multipart/alternative message with optional plain-text part."""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = from_header
+    msg['To'] = ', '.join(to_emails)
+
+    if text_body:
+        msg.attach(MIMEText(text_body, 'plain', 'utf-8'))
+    msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+    return msg
+
+
+class EmailSender:
+    """Send emails via SMTP."""
+
+    def __init__(self):
+        self.smtp_host = getattr(settings, 'smtp_host', 'smtp.gmail.com')
+        self.smtp_port = getattr(settings, 'smtp_port', 587)
+        self.smtp_user = getattr(settings, 'smtp_user', None)
+        self.smtp_password = getattr(settings, 'smtp_password', None)
+        self.from_email = getattr(settings, 'email_from', 'trademarks@example.com')
+        self.from_name = getattr(settings, 'email_from_name', 'Trademark System')
+        self._from_header = f"{self.from_name} <{self.from_email}>"
+
+        # Одно соединение на отправителя: рассылка проходит TLS и AUTH один
+        # раз; SMTP-сессия с состоянием, поэтому письма идут по очереди
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._smtp_expires_at = 0.0
+        self._smtp_lock = asyncio.Lock()
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """Return the open connection, or open and log in a new one."""
+        if (
+            self._smtp is not None
+            and self._smtp.is_connected
+            and time.monotonic() < self._smtp_expires_at
+        ):
+            return self._smtp
+
+        await self._disconnect()
+        smtp = aiosmtplib.SMTP(hostname=self.smtp_host, port=self.smtp_port, start_tls=True)
+        await smtp.connect()
+        try:
+            await smtp.login(self.smtp_user, self.smtp_password)
+        except BaseException:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        return smtp
+
+    async def _disconnect(self) -> None:
+        """Close the cached connection, if any."""
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+    async def aclose(self) -> None:
+        """Close the SMTP connection; call when done sending."""
+        async with self._smtp_lock:
+            await self._disconnect()
+
+    async def send_email(
+        self,
+        to_emails: List[str],
+        subject: str,
+        html_body: str,
+        text_body: Optional[str] = None,
+    ) -> bool:
+        """Send an email.
+
+        Args:
+            to_emails: List of recipient email addresses
+            subject: Email subject
+            html_body: HTML content of the email
+            text_body: Plain text alternative (optional)
+
+        Returns:
+            True if sent successfully, False otherwise
+        """
+        if not self.smtp_user or not self.smtp_password:
+            logger.warning("SMTP credentials not configured, skipping email")
+            return False
+
+        try:
+            # Сериализуем один раз: при повторной попытке уходят те же байты
+            message = _build_mime(
+                subject, self._from_header, to_emails, html_body, text_body
+            ).as_bytes()
+
+            # Send: соединение, STARTTLS и AUTH не блокируют event loop
+            async with self._smtp_lock:
+                reused = self._smtp is not None
+                try:
+                    server = await self._connect()
+                    await server.sendmail(self.from_email, to_emails, message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # Сервер мог закрыть простаивавшее соединение — одна попытка заново
+                    if not reused:
+                        raise
+                    await self._disconnect()
+                    server = await self._connect()
+                    await server.sendmail(self.from_email, to_emails, message)
+                self._smtp_expires_at = time.monotonic() + SMTP_IDLE_TIMEOUT
+
+            logger.info(f"Email sent to {to_emails}: {subject}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to send email: {e}")
+            # Состояние сессии после ошибки неизвестно — следующее письмо откроет новую
+            async with self._smtp_lock:
+                await self._disconnect()
+            return False
+
+    async def send_expiration_notification(
+        self,
+        to_emails: List[str],
+        trademark_name: str,
+        territory: str,
+        registration_number: str,
+        expiration_date: str,
+        days_left: int,
+    ) -> bool:
+        """Send trademark expiration notification."""
+        subject = f"[Важно] Истекает срок действия товарного знака: {trademark_name}"
+
+        urgency_color = "#d32f2f" if days_left <= 30 else "#ef6c00" if days_left <= 90 else "#1976d2"
+
+        html_body = _EXPIRATION_HTML.substitute(
+            urgency_color=urgency_color,
+            trademark_name=escape(trademark_name),
+            territory=escape(territory),
+            registration_number=escape(registration_number),
+            expiration_date=escape(expiration_date),
+            days_left=days_left,
+        )
+
+        text_body = _EXPIRATION_TEXT.substitute(
+            trademark_name=trademark_name,
+            territory=territory,
+            registration_number=registration_number,
+            expiration_date=expiration_date,
+            days_left=days_left,
+        )
+
+        return await self.send_email(to_emails, subject, html_body, text_body)
+
+    async def send_status_change_notification(
+        self,
+        to_emails: List[str],
+        trademark_name: str,
+        territory: str,
+        registration_number: str,
+        old_status: str,
+        new_status: str,
+    ) -> bool:
+        """Send notification about status change."""
+        subject = f"Изменение статуса товарного знака: {trademark_name}"
 
-        return self.send_email(to_emails, subject, html_body, text_body)
+        html_body = _STATUS_CHANGE_HTML.substitute(
+            trademark_name=escape(trademark_name),
+            territory=escape(territory),
+            registration_number=escape(registration_number),
+            old_status=escape(old_status),
+            new_status=escape(new_status),
+        )
+
+        text_body = _STATUS_CHANGE_TEXT.substitute(
+            trademark_name=trademark_name,
+            territory=territory,
+            registration_number=registration_number,
+            old_status=old_status,
+            new_status=new_status,
+        )
+
+        return await self.send_email(to_emails, subject, html_body, text_body)
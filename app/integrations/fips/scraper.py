@@ -3,17 +3,21 @@
 FIPS URL pattern:
 https://www1.fips.ru/registers-doc-view/fips_servlet?DB=RUTM&DocNumber={number}
 
-The site uses JavaScript rendering, so we need Playwright.
+Document pages are fetched over plain HTTP and parsed with lxml; Playwright
+is started only for pages whose data is not in the initial HTML.
 """
 
 import asyncio
+import functools
 import logging
 import re
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import Optional
 from urllib.parse import quote
 
+import aiohttp
+import lxml.html
 from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeout
 
 from app.config import settings
@@ -21,6 +25,117 @@ from app.config import settings
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _html_parser(encoding: Optional[str]) -> lxml.html.HTMLParser:
+    """HTML parser for a response charset (None: detect from the document)."""
+    return lxml.html.HTMLParser(encoding=encoding)
+
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+# Поле -> XPath-варианты по приоритету; общие для lxml и Playwright
+FIELD_XPATHS: dict[str, tuple[str, ...]] = {
+    'application_number': (
+        '//td[contains(text(), "(210)")]/following-sibling::td',
+        '//td[contains(text(), "Номер заявки")]/following-sibling::td',
+    ),
+    'trademark_name': (
+        '//td[contains(text(), "(540)")]/following-sibling::td',
+        '//td[contains(text(), "словесный элемент")]/following-sibling::td',
+    ),
+    'status': (
+        '//td[contains(text(), "Статус")]/following-sibling::td',
+        '//span[contains(@class, "status")]',
+    ),
+    'filing_date': (
+        '//td[contains(text(), "(220)")]/following-sibling::td',
+        '//td[contains(text(), "Дата подачи")]/following-sibling::td',
+    ),
+    'registration_date': (
+        '//td[contains(text(), "(151)")]/following-sibling::td',
+        '//td[contains(text(), "Дата регистрации")]/following-sibling::td',
+    ),
+    'expiration_date': (
+        '//td[contains(text(), "(181)")]/following-sibling::td',
+        '//td[contains(text(), "Срок действия")]/following-sibling::td',
+        '//td[contains(text(), "истечения срока")]/following-sibling::td',
+    ),
+    'rights_holder': (
+        '//td[contains(text(), "(732)")]/following-sibling::td',
+        '//td[contains(text(), "Правообладатель")]/following-sibling::td',
+    ),
+    'classes': (
+        '//td[contains(text(), "(511)")]/following-sibling::td',
+        '//td[contains(text(), "МКТУ")]/following-sibling::td',
+    ),
+}
+
+IMAGE_XPATHS = (
+    '//img[contains(@src, "getImage")]/@src',
+    '//img[contains(@src, "trademark")]/@src',
+    '//img[contains(concat(" ", normalize-space(@class), " "), " tm-image ")]/@src',
+    '//img[contains(@src, "fips")]/@src',
+)
+
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'stylesheet', 'media'})
+
+DATE_FORMATS = (
+    '%d.%m.%Y',      # 31.12.2024
+    '%Y-%m-%d',      # 2024-12-31
+    '%d/%m/%Y',      # 31/12/2024
+    '%d %B %Y',      # 31 December 2024
+    '%d %b %Y',      # 31 Dec 2024
+)
+
+_DATE_RE = re.compile(r'(\d{2})[./](\d{2})[./](\d{4})')
+_NUMBER_RE = re.compile(r'\d+')
+# Pattern: class number followed by dash/colon and description
+_GOODS_RE = re.compile(
+    r'(\d{1,2})\s*[-:–—]\s*([^0-9]+?)(?=\d{1,2}\s*[-:–—]|$)', re.IGNORECASE
+)
+# Порядок важен: первый совпавший статус выигрывает
+_STATUS_PATTERNS = (
+    ('registered', re.compile(r'действует|зарегистрирован|active', re.IGNORECASE)),
+    ('terminated', re.compile(r'прекращ|аннулир|terminated', re.IGNORECASE)),
+    ('expired', re.compile(r'истек|expired', re.IGNORECASE)),
+    ('pending', re.compile(r'делопроизводств|pending', re.IGNORECASE)),
+    ('rejected', re.compile(r'отказ|rejected', re.IGNORECASE)),
+)
+
+# Все поля и картинка за один page.evaluate вместо пары CDP-вызовов на
+# каждый XPath; правила те же, что у _tree_field
+_EXTRACT_JS = """
+([fieldXpaths, imageXpaths]) => {
+    const first = (xpath) => document.evaluate(
+        xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    const fields = {};
+    for (const [key, xpaths] of Object.entries(fieldXpaths)) {
+        for (const xpath of xpaths) {
+            const node = first(xpath);
+            const text = node && (node.innerText ?? node.textContent ?? '').trim();
+            if (text) {
+                fields[key] = text;
+                break;
+            }
+        }
+    }
+    let image = null;
+    for (const xpath of imageXpaths) {
+        const node = first(xpath);
+        if (node && node.value) {
+            image = node.value;
+            break;
+        }
+    }
+    return {fields, image};
+}
+"""
+
+
 @dataclass
 class FIPSTrademarkData:
     """Data extracted from FIPS for a trademark."""
@@ -38,12 +153,15 @@ class FIPSTrademarkData:
     image_url: Optional[str] = None
     raw_html: Optional[str] = None
     error: Optional[str] = None
+    # Когда запрос получил слот семафора (без ожидания в очереди)
+    started_at: Optional[datetime] = None
 
 
 class FIPSScraper:
     """Scraper for FIPS (fips.ru) trademark database.
 
-    Uses Playwright for JavaScript-rendered pages.
+    Fetches pages with aiohttp and parses them with lxml; falls back to
+    Playwright when a page needs JavaScript to show its data.
     Implements rate limiting to avoid overloading the server.
     """
 
@@ -53,21 +171,44 @@ class FIPSScraper:
     # Rate limiting: requests per minute from settings
     RATE_LIMIT = getattr(settings, 'fips_rate_limit_per_minute', 12)
     MIN_DELAY = 60.0 / RATE_LIMIT  # Minimum seconds between requests
+    # Одновременных запросов на экземпляр: перекрывают задержки сети,
+    # частоту по-прежнему держит _rate_limit
+    MAX_CONCURRENCY = 4
+    # Сколько ждать свободную страницу пула, прежде чем считать попытку неудачной
+    PAGE_ACQUIRE_TIMEOUT = 60.0
 
     def __init__(self):
         self._last_request_time: float = 0
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._playwright = None
         self._browser = None
         self._context = None
+        self._pages: Optional[asyncio.Queue] = None
         self._lock = asyncio.Lock()
+        self._browser_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
 
     async def __aenter__(self):
         """Async context manager entry."""
-        await self._start_browser()
+        # keep-alive сессия; браузер запускается только если понадобится
+        self._http = aiohttp.ClientSession(
+            headers={'User-Agent': USER_AGENT, 'Accept-Language': 'ru-RU,ru;q=0.9'},
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit."""
-        await self._close_browser()
+        if self._http:
+            await self._http.close()
+        if self._browser:
+            await self._close_browser()
+
+    async def _ensure_browser(self):
+        """Start the browser on first use."""
+        async with self._browser_lock:
+            if self._context is None:
+                await self._start_browser()
 
     async def _start_browser(self):
         """Start Playwright browser."""
@@ -78,11 +219,34 @@ class FIPSScraper:
         )
         self._context = await self._browser.new_context(
             viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            user_agent=USER_AGENT,
             locale='ru-RU'
         )
+        # Нужен только DOM: картинки, шрифты и стили не качаем (URL
+        # картинки берётся из атрибута src), networkidle наступает раньше
+        await self._context.route('**/*', self._route_request)
+
+        # Пул прогретых страниц: по одной на одновременный запрос, между
+        # документами страница не закрывается, а уходит на about:blank
+        self._pages = asyncio.Queue()
+        for _ in range(self.MAX_CONCURRENCY):
+            self._pages.put_nowait(await self._new_page())
         logger.info("FIPS scraper browser started")
 
+    @staticmethod
+    async def _route_request(route) -> None:
+        """Abort subresources the scraper never reads."""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_page(self) -> Page:
+        """Open a page with the scraper's navigation timeout."""
+        page = await self._context.new_page()
+        page.set_default_navigation_timeout(30000)
+        return page
+
     async def _close_browser(self):
         """Close Playwright browser."""
         if self._context:
@@ -118,7 +282,18 @@ class FIPSScraper:
 
         Returns:
             FIPSTrademarkData with extracted information
+
+        Safe to call concurrently on one scraper; at most MAX_CONCURRENCY
+        lookups run at a time.
         """
+        async with self._semaphore:
+            started_at = datetime.now(timezone.utc)
+            result = await self._fetch_trademark(registration_number, retries)
+            result.started_at = started_at
+            return result
+
+    async def _fetch_trademark(self, registration_number: str, retries: int) -> FIPSTrademarkData:
+        """Fetch one document with retries."""
         result = FIPSTrademarkData(registration_number=registration_number)
 
         for attempt in range(retries):
@@ -129,34 +304,38 @@ class FIPSScraper:
                 url = f"{self.BASE_URL}?DB=RUTM&DocNumber={quote(registration_number)}"
                 logger.info(f"Fetching FIPS data for {registration_number} (attempt {attempt + 1})")
 
-                # Create new page
-                page = await self._context.new_page()
-
-                try:
-                    # Navigate to page
-                    response = await page.goto(url, wait_until='networkidle', timeout=30000)
-
+                async with self._http.get(url) as response:
                     if response.status != 200:
                         result.error = f"HTTP {response.status}"
                         continue
+                    # Байты разбирает lxml: кодировку (windows-1251) берёт из
+                    # заголовка или <meta>, без отдельного декодирования
+                    body = await response.read()
+                    charset = response.charset
+
+                tree = lxml.html.fromstring(body, parser=_html_parser(charset))
+                if self._is_not_found(tree.text_content()):
+                    result.error = "Trademark not found"
+                    return result
 
-                    # Wait for content to load
-                    await page.wait_for_selector('body', timeout=10000)
-
-                    # Check if trademark exists
-                    content = await page.content()
-                    if 'не найден' in content.lower() or 'not found' in content.lower():
-                        result.error = "Trademark not found"
-                        return result
-
-                    # Extract data
-                    result = await self._extract_data(page, registration_number)
-                    result.raw_html = content
-
+                if self._has_data(tree):
+                    result = self._extract_from_tree(tree, registration_number)
+                    result.raw_html = lxml.html.tostring(tree, encoding='unicode')
                     return result
 
-                finally:
-                    await page.close()
+                # В исходном HTML данных нет — страницу рисует JavaScript
+                logger.info(f"FIPS page for {registration_number} needs rendering, using browser")
+                await self._rate_limit()
+                result = await self._fetch_with_browser(url, registration_number)
+                if result.error and result.error.startswith("HTTP "):
+                    continue
+                return result
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"HTTP error for {registration_number}: {e}")
+                result.error = f"HTTP error: {e}"
+                if attempt < retries - 1:
+                    await asyncio.sleep(5)
 
             except PlaywrightTimeout as e:
                 logger.warning(f"Timeout for {registration_number}: {e}")
@@ -172,133 +351,155 @@ class FIPSScraper:
 
         return result
 
-    async def _extract_data(self, page: Page, registration_number: str) -> FIPSTrademarkData:
-        """Extract trademark data from loaded page."""
+    async def _fetch_with_browser(self, url: str, registration_number: str) -> FIPSTrademarkData:
+        """Render the page in Playwright and extract data from it."""
         result = FIPSTrademarkData(registration_number=registration_number)
+        await self._ensure_browser()
+
+        page = await asyncio.wait_for(self._pages.get(), self.PAGE_ACQUIRE_TIMEOUT)
+
+        try:
+            # Navigate to page
+            response = await page.goto(url, wait_until='networkidle')
+
+            if response.status != 200:
+                result.error = f"HTTP {response.status}"
+                return result
+
+            # Wait for content to load
+            await page.wait_for_selector('body', timeout=10000)
+
+            # Check if trademark exists
+            content = await page.content()
+            if self._is_not_found(content):
+                result.error = "Trademark not found"
+                return result
+
+            # Extract data
+            result = await self._extract_data(page, registration_number)
+            result.raw_html = content
+
+            return result
+
+        finally:
+            await self._release_page(page)
+
+    async def _release_page(self, page: Page) -> None:
+        """Reset a page and return it to the pool, replacing it if broken.
 
+        Never raises: the pool must keep its size, otherwise later lookups
+        would wait for a page that never comes back.
+        """
         try:
-            # Try to extract registration number (confirmation)
-            reg_num = await self._extract_field(page, [
-                '//td[contains(text(), "(210)")]/following-sibling::td',
-                '//td[contains(text(), "Номер заявки")]/following-sibling::td',
-            ])
-            if reg_num:
-                result.application_number = reg_num.strip()
-
-            # Extract trademark name/description
-            name = await self._extract_field(page, [
-                '//td[contains(text(), "(540)")]/following-sibling::td',
-                '//td[contains(text(), "словесный элемент")]/following-sibling::td',
-            ])
-            if name:
-                result.trademark_name = name.strip()
-
-            # Extract status
-            status = await self._extract_field(page, [
-                '//td[contains(text(), "Статус")]/following-sibling::td',
-                '//span[contains(@class, "status")]',
-            ])
-            if status:
-                result.status = self._normalize_status(status.strip())
-
-            # Extract filing date (date of application)
-            filing = await self._extract_field(page, [
-                '//td[contains(text(), "(220)")]/following-sibling::td',
-                '//td[contains(text(), "Дата подачи")]/following-sibling::td',
-            ])
-            if filing:
-                result.filing_date = self._parse_date(filing)
-
-            # Extract registration date
-            reg_date = await self._extract_field(page, [
-                '//td[contains(text(), "(151)")]/following-sibling::td',
-                '//td[contains(text(), "Дата регистрации")]/following-sibling::td',
-            ])
-            if reg_date:
-                result.registration_date = self._parse_date(reg_date)
-
-            # Extract expiration date
-            exp_date = await self._extract_field(page, [
-                '//td[contains(text(), "(181)")]/following-sibling::td',
-                '//td[contains(text(), "Срок действия")]/following-sibling::td',
-                '//td[contains(text(), "истечения срока")]/following-sibling::td',
-            ])
-            if exp_date:
-                result.expiration_date = self._parse_date(exp_date)
-
-            # Extract rights holder
-            holder = await self._extract_field(page, [
-                '//td[contains(text(), "(732)")]/following-sibling::td',
-                '//td[contains(text(), "Правообладатель")]/following-sibling::td',
-            ])
-            if holder:
-                result.rights_holder = holder.strip()
-
-            # Extract ICGS classes and goods/services descriptions
-            classes_text = await self._extract_field(page, [
-                '//td[contains(text(), "(511)")]/following-sibling::td',
-                '//td[contains(text(), "МКТУ")]/following-sibling::td',
-            ])
-            if classes_text:
-                result.icgs_classes = self._parse_classes(classes_text)
-                result.goods_services = self._parse_goods_services(classes_text)
-
-            # Extract image URL
-            image_url = await self._extract_image_url(page)
-            if image_url:
-                result.image_url = image_url
+            await page.goto('about:blank')
+        except Exception as e:
+            logger.debug(f"Replacing FIPS browser page: {e}")
+            try:
+                replacement = await self._new_page()
+            except Exception as new_page_error:
+                # Возвращаем старую страницу: следующая попытка снова её заменит
+                logger.warning(f"Could not open FIPS browser page: {new_page_error}")
+            else:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+                page = replacement
+        self._pages.put_nowait(page)
+
+    @staticmethod
+    def _is_not_found(content: str) -> bool:
+        """Whether the page says the document does not exist."""
+        content = content.lower()
+        return 'не найден' in content or 'not found' in content
+
+    @staticmethod
+    def _tree_field(tree: lxml.html.HtmlElement, xpaths: tuple[str, ...]) -> Optional[str]:
+        """First non-empty text among XPath matches in a parsed page."""
+        for xpath in xpaths:
+            for node in tree.xpath(xpath)[:1]:
+                text = node.text_content().strip()
+                if text:
+                    return text
+        return None
+
+    def _has_data(self, tree: lxml.html.HtmlElement) -> bool:
+        """Whether the static HTML already carries the document fields."""
+        return any(
+            self._tree_field(tree, FIELD_XPATHS[key])
+            for key in ('application_number', 'trademark_name', 'classes')
+        )
 
+    def _extract_from_tree(
+        self,
+        tree: lxml.html.HtmlElement,
+        registration_number: str,
+    ) -> FIPSTrademarkData:
+        """Extract trademark data from a page parsed with lxml."""
+        fields = {key: self._tree_field(tree, xpaths) for key, xpaths in FIELD_XPATHS.items()}
+
+        result = self._build_result(registration_number, fields)
+        for xpath in IMAGE_XPATHS:
+            sources = tree.xpath(xpath)
+            if sources:
+                result.image_url = self._absolute_url(str(sources[0]))
+                break
+        return result
+
+    def _build_result(
+        self,
+        registration_number: str,
+        fields: dict[str, Optional[str]],
+    ) -> FIPSTrademarkData:
+        """Convert raw field texts into FIPSTrademarkData."""
+        result = FIPSTrademarkData(registration_number=registration_number)
+
+        try:
+            if fields.get('application_number'):
+                result.application_number = fields['application_number'].strip()
+            if fields.get('trademark_name'):
+                result.trademark_name = fields['trademark_name'].strip()
+            if fields.get('status'):
+                result.status = self._normalize_status(fields['status'].strip())
+            if fields.get('filing_date'):
+                result.filing_date = self._parse_date(fields['filing_date'])
+            if fields.get('registration_date'):
+                result.registration_date = self._parse_date(fields['registration_date'])
+            if fields.get('expiration_date'):
+                result.expiration_date = self._parse_date(fields['expiration_date'])
+            if fields.get('rights_holder'):
+                result.rights_holder = fields['rights_holder'].strip()
+            if fields.get('classes'):
+                result.icgs_classes = self._parse_classes(fields['classes'])
+                result.goods_services = self._parse_goods_services(fields['classes'])
         except Exception as e:
             logger.error(f"Error extracting data: {e}")
             result.error = f"Extraction error: {e}"
 
         return result
 
-    async def _extract_field(self, page: Page, xpaths: list[str]) -> Optional[str]:
-        """Try multiple XPath selectors to extract a field."""
-        for xpath in xpaths:
-            try:
-                element = await page.query_selector(f'xpath={xpath}')
-                if element:
-                    text = await element.inner_text()
-                    if text and text.strip():
-                        return text.strip()
-            except Exception:
-                continue
-        return None
+    @staticmethod
+    def _absolute_url(src: str) -> str:
+        """Make a FIPS-relative URL absolute."""
+        if src.startswith('/'):
+            return f"https://www1.fips.ru{src}"
+        return src
 
-    async def _extract_image_url(self, page: Page) -> Optional[str]:
-        """Extract trademark image URL from page."""
+    async def _extract_data(self, page: Page, registration_number: str) -> FIPSTrademarkData:
+        """Extract trademark data from loaded page."""
         try:
-            # Try to find image in various locations
-            selectors = [
-                'img[src*="getImage"]',
-                'img[src*="trademark"]',
-                'img.tm-image',
-                '//img[contains(@src, "fips")]',
-            ]
-
-            for selector in selectors:
-                try:
-                    if selector.startswith('//'):
-                        element = await page.query_selector(f'xpath={selector}')
-                    else:
-                        element = await page.query_selector(selector)
-
-                    if element:
-                        src = await element.get_attribute('src')
-                        if src:
-                            # Make absolute URL if relative
-                            if src.startswith('/'):
-                                src = f"https://www1.fips.ru{src}"
-                            return src
-                except Exception:
-                    continue
-
+            extracted = await page.evaluate(_EXTRACT_JS, [FIELD_XPATHS, IMAGE_XPATHS])
         except Exception as e:
-            logger.debug(f"Could not extract image URL: {e}")
+            logger.error(f"Error extracting data: {e}")
+            result = FIPSTrademarkData(registration_number=registration_number)
+            result.error = f"Extraction error: {e}"
+            return result
 
-        return None
+        result = self._build_result(registration_number, extracted['fields'])
+        if extracted['image']:
+            result.image_url = self._absolute_url(extracted['image'])
+
+        return result
 
     def _parse_date(self, date_str: str) -> Optional[date]:
         """Parse date from various formats."""
@@ -309,22 +510,14 @@ class FIPSScraper:
         date_str = date_str.strip()
 
         # Try various date formats
-        formats = [
-            '%d.%m.%Y',      # 31.12.2024
-            '%Y-%m-%d',      # 2024-12-31
-            '%d/%m/%Y',      # 31/12/2024
-            '%d %B %Y',      # 31 December 2024
-            '%d %b %Y',      # 31 Dec 2024
-        ]
-
-        for fmt in formats:
+        for fmt in DATE_FORMATS:
             try:
                 return datetime.strptime(date_str, fmt).date()
             except ValueError:
                 continue
 
         # Try to extract date with regex
-        match = re.search(r'(\d{2})[./](\d{2})[./](\d{4})', date_str)
+        match = _DATE_RE.search(date_str)
         if match:
             try:
                 day, month, year = map(int, match.groups())
@@ -341,7 +534,7 @@ class FIPSScraper:
             return []
 
         # Find all numbers in the string
-        numbers = re.findall(r'\d+', classes_str)
+        numbers = _NUMBER_RE.findall(classes_str)
         classes = []
 
         for num in numbers:
@@ -371,9 +564,7 @@ class FIPSScraper:
         text = text.replace('\n', ' ').replace('\r', ' ')
 
         # Find all class entries
-        # Pattern: class number followed by dash/colon and description
-        pattern = r'(\d{1,2})\s*[-:–—]\s*([^0-9]+?)(?=\d{1,2}\s*[-:–—]|$)'
-        matches = re.findall(pattern, text, re.IGNORECASE)
+        matches = _GOODS_RE.findall(text)
 
         for match in matches:
             try:
@@ -388,18 +579,9 @@ class FIPSScraper:
 
     def _normalize_status(self, status: str) -> str:
         """Normalize status string to standard values."""
-        status_lower = status.lower()
-
-        if any(word in status_lower for word in ['действует', 'зарегистрирован', 'active']):
-            return 'registered'
-        elif any(word in status_lower for word in ['прекращ', 'аннулир', 'terminated']):
-            return 'terminated'
-        elif any(word in status_lower for word in ['истек', 'expired']):
-            return 'expired'
-        elif any(word in status_lower for word in ['делопроизводств', 'pending']):
-            return 'pending'
-        elif any(word in status_lower for word in ['отказ', 'rejected']):
-            return 'rejected'
+        for normalized, pattern in _STATUS_PATTERNS:
+            if pattern.search(status):
+                return normalized
 
         return status
 
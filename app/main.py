@@ -10,6 +10,8 @@ from fastapi.responses import FileResponse
 
 from app.api.v1 import api_router
 from app.config import settings
+from app.core.cache import create_redis_client
+from app.core.http import create_egrul_client
 from app.database import init_db
 
 STATIC_DIR = Path(__file__).parent / "static"
@@ -20,9 +22,12 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
     await init_db()
+    app.state.egrul_client = create_egrul_client()
+    app.state.redis = create_redis_client()
     yield
     # Shutdown
-    pass
+    await app.state.egrul_client.aclose()
+    await app.state.redis.aclose()
 
 
 app = FastAPI(
@@ -39,6 +44,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Курсор следующей страницы /sync/logs браузер иначе не покажет
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API router
@@ -7,8 +7,10 @@ from enum import Enum
 from typing import List, Optional
 
 from sqlalchemy import (
+    DDL,
     Boolean,
     CheckConstraint,
+    Computed,
     Date,
     DateTime,
     ForeignKey,
@@ -17,15 +19,28 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    event,
     func,
     Index,
+    text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY, INET, JSONB, UUID
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
+from app.core.icgs import ICGS_KEYWORDS_FUNCTION, icgs_keywords_function_sql
+from app.core.text import normalize_text
 from app.database import Base
 
 
+def _normalized_from(source: str):
+    """Column default computing the normalized form of another column on INSERT."""
+
+    def default(context) -> str:
+        return normalize_text(context.get_current_parameters()[source])
+
+    return default
+
+
 class RegistrationStatus(str, Enum):
     """Status of trademark registration."""
 
@@ -81,10 +96,15 @@ class RightsHolder(Base):
         String(500),
         nullable=False,
     )
+    # Всегда выводится из name: default для INSERT (в т.ч. Core-вставок),
+    # @validates для изменения name через ORM. Уникален: импорт делает
+    # INSERT ... ON CONFLICT (name_normalized)
     name_normalized: Mapped[str] = mapped_column(
         String(500),
         nullable=False,
         index=True,
+        unique=True,
+        default=_normalized_from("name"),
     )
     aliases: Mapped[List[str]] = mapped_column(
         ARRAY(Text),
@@ -107,6 +127,11 @@ class RightsHolder(Base):
         lazy="selectin",
     )
 
+    @validates("name")
+    def _sync_name_normalized(self, key: str, value: str) -> str:
+        self.name_normalized = normalize_text(value)
+        return value
+
     def __repr__(self) -> str:
         return f"<RightsHolder {self.name[:50]}>"
 
@@ -129,6 +154,13 @@ class Territory(Base):
         String(100),
         nullable=False,
     )
+    # Выводится из name_en так же, как RightsHolder.name_normalized из name
+    name_normalized: Mapped[str] = mapped_column(
+        String(100),
+        nullable=False,
+        index=True,
+        default=_normalized_from("name_en"),
+    )
     iso_code: Mapped[Optional[str]] = mapped_column(
         String(3),
         nullable=True,
@@ -170,6 +202,11 @@ class Territory(Base):
         lazy="selectin",
     )
 
+    @validates("name_en")
+    def _sync_name_normalized(self, key: str, value: str) -> str:
+        self.name_normalized = normalize_text(value)
+        return value
+
     def __repr__(self) -> str:
         return f"<Territory {self.name_en}>"
 
@@ -178,6 +215,10 @@ class Trademark(Base):
     """Core trademark entity."""
 
     __tablename__ = "trademarks"
+    __table_args__ = (
+        # Keyset-пагинация списка: ORDER BY name, id / WHERE (name, id) > (...)
+        Index("ix_trademarks_name_id", "name", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -187,7 +228,6 @@ class Trademark(Base):
     name: Mapped[str] = mapped_column(
         String(500),
         nullable=False,
-        index=True,
     )
     name_transliterated: Mapped[Optional[str]] = mapped_column(
         String(500),
@@ -262,11 +302,11 @@ class TrademarkClass(Base):
         primary_key=True,
         default=uuid.uuid4,
     )
+    # Индекс не нужен: trademark_id - первая колонка уникального ограничения
     trademark_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("trademarks.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     icgs_class: Mapped[int] = mapped_column(
         Integer,
@@ -282,6 +322,17 @@ class TrademarkClass(Base):
         nullable=True,
         index=True,
     )
+    # Текст для поиска по товарам: описание + ключевые слова класса МКТУ.
+    # Нужен только в WHERE, поэтому не грузится вместе с классами
+    search_text: Mapped[str] = mapped_column(
+        Text,
+        Computed(
+            f"coalesce(goods_services_description, '') || ' ' || "
+            f"{ICGS_KEYWORDS_FUNCTION}(icgs_class)",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     # Relationships
     trademark: Mapped["Trademark"] = relationship(
@@ -306,7 +357,19 @@ class TrademarkRegistration(Base):
         ),
         Index("idx_registrations_expiration", "expiration_date"),
         Index("idx_registrations_status", "status"),
-        Index("idx_registrations_renewal_status", "renewal_status"),
+        Index(
+            "ix_reg_active_expiration",
+            "renewal_status",
+            "expiration_date",
+            postgresql_include=["id", "territory_id", "trademark_id"],
+        ),
+        Index(
+            "ix_reg_territory_status_exp",
+            "territory_id",
+            "status",
+            "expiration_date",
+            postgresql_where=text("renewal_status = 'active'"),
+        ),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -314,11 +377,11 @@ class TrademarkRegistration(Base):
         primary_key=True,
         default=uuid.uuid4,
     )
+    # Индекс не нужен: trademark_id - первая колонка уникального ограничения
     trademark_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("trademarks.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     territory_id: Mapped[int] = mapped_column(
         Integer,
@@ -483,6 +546,14 @@ class RenewalAction(Base):
     """Log of renewal-related actions."""
 
     __tablename__ = "renewal_actions"
+    __table_args__ = (
+        Index(
+            "ix_renewal_actions_action_date_brin",
+            "action_date",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -622,6 +693,13 @@ class Notification(Base):
     """Notification record for expiration and status changes."""
 
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index(
+            "ix_notifications_pending",
+            "scheduled_send_date",
+            postgresql_where=text("is_suppressed = false AND email_sent_at IS NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -708,6 +786,11 @@ class SyncLog(Base):
     """Log of synchronization operations with FIPS/WIPO."""
 
     __tablename__ = "sync_logs"
+    __table_args__ = (
+        # Keyset-пагинация /sync/logs (created_at DESC, id DESC — обратный
+        # проход по btree); заодно покрывает диапазоны по created_at
+        Index("ix_sync_logs_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -754,7 +837,6 @@ class SyncLog(Base):
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
-        index=True,
     )
 
     # Relationships
@@ -984,6 +1066,17 @@ class AuditLog(Base):
     """Audit log for tracking all modifications."""
 
     __tablename__ = "audit_log"
+    __table_args__ = (
+        Index(
+            "ix_audit_log_created_at_brin",
+            "created_at",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+        # Помесячные партиции создаёт миграция 004 и задача
+        # ensure_audit_log_partitions; ключ партиции входит в PK.
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -1027,9 +1120,56 @@ class AuditLog(Base):
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         server_default=func.now(),
         nullable=False,
     )
 
     def __repr__(self) -> str:
         return f"<AuditLog {self.action}>"
+
+
+# create_all() создаёт только родительскую таблицу; без партиции вставки
+# в audit_log падают, поэтому сразу добавляем партицию по умолчанию.
+event.listen(
+    AuditLog.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT"),
+)
+
+# Генерируемая колонка trademark_classes.search_text вызывает эту функцию,
+# поэтому при create_all() она должна появиться раньше таблицы.
+event.listen(
+    TrademarkClass.__table__,
+    "before_create",
+    DDL(icgs_keywords_function_sql()),
+)
+
+# Сводка для /sync/stats: одна строка, обновляется задачей refresh_sync_stats.
+# Уникальный индекс по id нужен для REFRESH ... CONCURRENTLY.
+SYNC_STATS_VIEW = "sync_stats_mv"
+
+event.listen(
+    SyncLog.__table__,
+    "after_create",
+    DDL(
+        f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {SYNC_STATS_VIEW} AS
+        SELECT
+            1 AS id,
+            count(*) AS total,
+            count(*) FILTER (WHERE status = 'success') AS successful,
+            count(*) FILTER (WHERE status = 'failed') AS failed,
+            count(*) FILTER (WHERE source = 'fips') AS fips,
+            count(*) FILTER (WHERE source = 'wipo') AS wipo,
+            max(created_at) AS last_sync,
+            now() AS refreshed_at
+        FROM sync_logs
+        """
+    ),
+)
+event.listen(
+    SyncLog.__table__,
+    "after_create",
+    DDL(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{SYNC_STATS_VIEW}_id ON {SYNC_STATS_VIEW} (id)"),
+)
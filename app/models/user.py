@@ -33,7 +33,6 @@ class User(Base):
         String(255),
         unique=True,
         nullable=False,
-        index=True,
     )
     password_hash: Mapped[str] = mapped_column(
         String(255),
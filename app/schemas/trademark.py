@@ -1,7 +1,7 @@
 """Trademark-related Pydantic schemas."""
 
 from datetime import date, datetime
-from typing import List, Optional
+from typing import ClassVar, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
@@ -74,6 +74,16 @@ class RegistrationUpdate(BaseModel):
     renewal_notes: Optional[str] = None
     comments: Optional[str] = None
 
+    # Колонки, которые PATCH может менять; пересекается с model_fields_set
+    _UPDATABLE_FIELDS: ClassVar[frozenset[str]] = frozenset({
+        "expiration_date",
+        "status",
+        "renewal_status",
+        "renewal_filed_date",
+        "renewal_notes",
+        "comments",
+    })
+
 
 class RegistrationResponse(RegistrationBase):
     """Registration response schema."""
@@ -140,10 +150,11 @@ class TrademarkListResponse(BaseModel):
     """Paginated trademark list response."""
 
     items: List[TrademarkResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class RenewalActionCreate(BaseModel):
@@ -1,10 +1,11 @@
 """Consent letter DOCX generator."""
 
 import os
+import shutil
 from datetime import date
-from io import BytesIO
 from pathlib import Path
-from typing import List, Optional
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, List, Optional
 
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -14,6 +15,8 @@ from docx.oxml import OxmlElement
 
 from app.models import ConsentLetter, RightsHolder
 
+DOCX_SPOOL_MAX_SIZE = 1024 * 1024
+
 
 def format_date_ru(d: date) -> str:
     """Format date in Russian format."""
@@ -234,11 +237,12 @@ def _add_english_part(doc, consent: ConsentLetter, rights_holder: RightsHolder,
 def generate_consent_docx(
     consent: ConsentLetter,
     rights_holder: RightsHolder,
-) -> BytesIO:
+) -> BinaryIO:
     """Generate consent letter DOCX document.
 
     Supports document_language: 'ru', 'en', or 'both'.
-    Returns BytesIO buffer with the generated document.
+    Returns a file object positioned at the start of the document; it is
+    kept in memory up to DOCX_SPOOL_MAX_SIZE and spills to disk beyond that.
     """
     doc = Document()
 
@@ -278,8 +282,8 @@ def generate_consent_docx(
         doc.add_page_break()
         _add_english_part(doc, consent, rights_holder, rh_address_en)
 
-    # Save to BytesIO
-    buffer = BytesIO()
+    # Save to a spooled file: large documents (embedded images) go to disk
+    buffer = SpooledTemporaryFile(max_size=DOCX_SPOOL_MAX_SIZE)
     doc.save(buffer)
     buffer.seek(0)
 
@@ -304,7 +308,7 @@ def save_consent_docx(
 
     buffer = generate_consent_docx(consent, rights_holder)
 
-    with open(filepath, 'wb') as f:
-        f.write(buffer.read())
+    with buffer, open(filepath, 'wb') as f:
+        shutil.copyfileobj(buffer, f)
 
     return filepath
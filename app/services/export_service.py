@@ -1,14 +1,15 @@
 """Service for exporting trademarks to Excel."""
 
-import io
+import asyncio
+import tempfile
 from datetime import date
-from typing import List, Optional
+from typing import BinaryIO, List, Optional
 from uuid import UUID
 
 import xlsxwriter
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.models import Trademark, TrademarkRegistration, TrademarkClass
 from app.models.trademark import RenewalStatus, RegistrationStatus
@@ -63,69 +64,92 @@ class ExportService:
     async def export_to_excel(
         self,
         filters: Optional[TrademarkExportFilters] = None,
-    ) -> bytes:
+    ) -> BinaryIO:
         """
         Export trademarks to Excel based on filters.
 
-        Returns bytes of the Excel file.
+        Returns a temporary file positioned at the start of the workbook;
+        the caller streams it out and closes it.
         """
         # Get filtered data
         registrations = await self._get_filtered_registrations(filters)
+        rows = [self._extract_row_data(registration) for registration in registrations]
+        del registrations
+
+        # Запись книги синхронная и долгая — уводим её из event loop
+        return await asyncio.to_thread(self._write_workbook, rows)
+
+    def _write_workbook(self, rows: List[dict]) -> BinaryIO:
+        """Write rows to an XLSX temporary file."""
+        output = tempfile.TemporaryFile()
+        try:
+            # constant_memory сбрасывает каждую строку на диск сразу после записи
+            workbook = xlsxwriter.Workbook(output, {"constant_memory": True})
+            worksheet = workbook.add_worksheet("Товарные знаки")
+
+            # Define formats
+            header_format = workbook.add_format({
+                "bold": True,
+                "bg_color": "#4472C4",
+                "font_color": "white",
+                "border": 1,
+                "align": "center",
+                "valign": "vcenter",
+                "text_wrap": True,
+            })
+
+            date_format = workbook.add_format({
+                "num_format": "dd.mm.yyyy",
+                "border": 1,
+            })
+
+            cell_format = workbook.add_format({
+                "border": 1,
+                "valign": "vcenter",
+                "text_wrap": True,
+            })
+
+            # Write headers
+            for col, (key, title, width) in enumerate(EXPORT_COLUMNS):
+                worksheet.write(0, col, title, header_format)
+                worksheet.set_column(col, col, width)
+
+            # Freeze header row
+            worksheet.freeze_panes(1, 0)
+
+            # Тип колонки известен заранее: вызываем типизированные write_*
+            # напрямую, минуя разбор значения в worksheet.write на каждой ячейке
+            write_blank = worksheet.write_blank
+            write_string = worksheet.write_string
+            write_datetime = worksheet.write_datetime
+            columns = [
+                (col, key, key.endswith("_date"))
+                for col, (key, _, _) in enumerate(EXPORT_COLUMNS)
+            ]
+
+            # Write data
+            for row_num, row_data in enumerate(rows, start=1):
+                for col, key, is_date in columns:
+                    value = row_data[key]
+
+                    if not value:
+                        write_blank(row_num, col, None, cell_format)
+                    elif is_date:
+                        write_datetime(row_num, col, value, date_format)
+                    else:
+                        write_string(row_num, col, value, cell_format)
+
+            # Add autofilter
+            if rows:
+                worksheet.autofilter(0, 0, len(rows), len(EXPORT_COLUMNS) - 1)
+
+            workbook.close()
+        except BaseException:
+            output.close()
+            raise
 
-        # Create Excel file
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
-        worksheet = workbook.add_worksheet("Товарные знаки")
-
-        # Define formats
-        header_format = workbook.add_format({
-            "bold": True,
-            "bg_color": "#4472C4",
-            "font_color": "white",
-            "border": 1,
-            "align": "center",
-            "valign": "vcenter",
-            "text_wrap": True,
-        })
-
-        date_format = workbook.add_format({
-            "num_format": "dd.mm.yyyy",
-            "border": 1,
-        })
-
-        cell_format = workbook.add_format({
-            "border": 1,
-            "valign": "vcenter",
-            "text_wrap": True,
-        })
-
-        # Write headers
-        for col, (key, title, width) in enumerate(EXPORT_COLUMNS):
-            worksheet.write(0, col, title, header_format)
-            worksheet.set_column(col, col, width)
-
-        # Freeze header row
-        worksheet.freeze_panes(1, 0)
-
-        # Write data
-        for row_num, registration in enumerate(registrations, start=1):
-            row_data = self._extract_row_data(registration)
-
-            for col, (key, _, _) in enumerate(EXPORT_COLUMNS):
-                value = row_data.get(key)
-
-                if key.endswith("_date") and value:
-                    worksheet.write(row_num, col, value, date_format)
-                else:
-                    worksheet.write(row_num, col, value or "", cell_format)
-
-        # Add autofilter
-        if registrations:
-            worksheet.autofilter(0, 0, len(registrations), len(EXPORT_COLUMNS) - 1)
-
-        workbook.close()
         output.seek(0)
-        return output.getvalue()
+        return output
 
     async def _get_filtered_registrations(
         self,
@@ -135,9 +159,9 @@ class ExportService:
         query = (
             select(TrademarkRegistration)
             .options(
-                selectinload(TrademarkRegistration.trademark).selectinload(Trademark.rights_holder),
+                selectinload(TrademarkRegistration.trademark).joinedload(Trademark.rights_holder),
                 selectinload(TrademarkRegistration.trademark).selectinload(Trademark.classes),
-                selectinload(TrademarkRegistration.territory),
+                joinedload(TrademarkRegistration.territory),
             )
         )
 
@@ -0,0 +1,39 @@
+"""Registration status mapping shared by the Excel importers."""
+
+from typing import Dict
+
+from app.models.trademark import RegistrationStatus
+
+# Подстрока статуса в Excel -> RegistrationStatus. Порядок — приоритет:
+# побеждает первый ключ, встретившийся в строке, где бы он ни стоял
+# ("экспертиза, отказ" -> rejected). Фразы, содержащие "регистрация",
+# стоят раньше неё, иначе были бы недостижимы.
+STATUS_MAPPING: Dict[str, str] = {
+    "частичная регистрация": RegistrationStatus.PARTIAL_REGISTRATION.value,
+    "решение о регистрации": RegistrationStatus.DECISION_PENDING.value,
+    "регистрация": RegistrationStatus.REGISTERED.value,
+    "регисрация": RegistrationStatus.REGISTERED.value,  # typo in data
+    "registration": RegistrationStatus.REGISTERED.value,
+    "отказ": RegistrationStatus.REJECTED.value,
+    "rejection": RegistrationStatus.REJECTED.value,
+    "refused": RegistrationStatus.REJECTED.value,
+    "partial": RegistrationStatus.PARTIAL_REGISTRATION.value,
+    "действие прекращено": RegistrationStatus.TERMINATED.value,
+    "terminated": RegistrationStatus.TERMINATED.value,
+    "делопроизводство": RegistrationStatus.PENDING.value,
+    "pending": RegistrationStatus.PENDING.value,
+    "экспертиза": RegistrationStatus.PENDING.value,
+    "examination": RegistrationStatus.PENDING.value,
+    "период оппозиции": RegistrationStatus.OPPOSITION.value,
+    "opposition": RegistrationStatus.OPPOSITION.value,
+}
+
+_STATUS_PRIORITY = tuple(STATUS_MAPPING.items())
+
+
+def match_status(text: str) -> str:
+    """Map normalized status text to a RegistrationStatus value by key priority."""
+    for key, mapped_status in _STATUS_PRIORITY:
+        if key in text:
+            return mapped_status
+    return RegistrationStatus.PENDING.value
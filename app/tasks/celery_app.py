@@ -12,6 +12,7 @@ celery_app = Celery(
     include=[
         "app.tasks.notification_tasks",
         "app.tasks.sync_tasks",
+        "app.tasks.maintenance_tasks",
     ],
 )
 
@@ -66,4 +67,14 @@ celery_app.conf.beat_schedule = {
         "task": "full_reconciliation",
         "schedule": crontab(hour=2, minute=0, day_of_week=0),
     },
+    # Keep the /sync/stats materialized view at most a minute behind
+    "refresh-sync-stats": {
+        "task": "refresh_sync_stats",
+        "schedule": 60.0,
+    },
+    # Pre-create audit_log partitions on the 1st of every month
+    "ensure-audit-log-partitions": {
+        "task": "ensure_audit_log_partitions",
+        "schedule": crontab(hour=1, minute=0, day_of_month=1),
+    },
 }
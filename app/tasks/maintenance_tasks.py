@@ -0,0 +1,68 @@
+"""Celery tasks for database maintenance."""
+
+import asyncio
+import logging
+
+from celery import shared_task
+from sqlalchemy import text
+
+from app.database import async_session_maker
+from app.models.trademark import SYNC_STATS_VIEW
+
+logger = logging.getLogger(__name__)
+
+# Сколько месяцев вперёд держать готовые партиции audit_log
+AUDIT_LOG_MONTHS_AHEAD = 3
+
+
+def _run_async(coro):
+    """Run async coroutine in sync context for Celery."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@shared_task(name="ensure_audit_log_partitions")
+def ensure_audit_log_partitions(months_ahead: int = AUDIT_LOG_MONTHS_AHEAD) -> dict:
+    """
+    Create monthly audit_log partitions ahead of time.
+
+    Rows for a month without a partition go to audit_log_default, and a
+    month cannot be attached once the default partition holds rows for it,
+    so partitions must exist before the month starts.
+    """
+
+    async def process():
+        async with async_session_maker() as session:
+            await session.execute(
+                text(
+                    "SELECT audit_log_ensure_partitions("
+                    "date_trunc('month', now())::date, :months_ahead)"
+                ),
+                {"months_ahead": months_ahead},
+            )
+            await session.commit()
+
+        logger.info(f"audit_log partitions ensured {months_ahead} months ahead")
+        return {"months_ahead": months_ahead}
+
+    return _run_async(process())
+
+
+@shared_task(name="refresh_sync_stats")
+def refresh_sync_stats() -> dict:
+    """Refresh the sync_stats_mv materialized view behind /sync/stats."""
+
+    async def process():
+        async with async_session_maker() as session:
+            await session.execute(
+                text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {SYNC_STATS_VIEW}")
+            )
+            await session.commit()
+
+        return {"view": SYNC_STATS_VIEW}
+
+    return _run_async(process())
@@ -112,6 +112,7 @@ async def _get_admin_emails() -> List[str]:
 
 
 async def _send_email_notification(
+    email_sender: EmailSender,
     admin_emails: List[str],
     registration: TrademarkRegistration,
     days_remaining: int,
@@ -120,14 +121,12 @@ async def _send_email_notification(
     if not admin_emails:
         return False
 
-    email_sender = EmailSender()
-
     trademark_name = registration.trademark.name if registration.trademark else "Unknown"
     territory = registration.territory.name_ru if registration.territory else "Unknown"
     reg_number = registration.registration_number or registration.application_number or "-"
     exp_date = registration.expiration_date.strftime("%d.%m.%Y")
 
-    return email_sender.send_expiration_notification(
+    return await email_sender.send_expiration_notification(
         to_emails=admin_emails,
         trademark_name=trademark_name,
         territory=territory,
@@ -166,7 +165,7 @@ async def _send_telegram_notification(
         return False
 
 
-async def _process_notifications_for_interval(days: int) -> dict:
+async def _process_notifications_for_interval(days: int, email_sender: EmailSender) -> dict:
     """Process notifications for a specific interval (180, 90, or 30 days)."""
     # Determine notification type
     if days >= 180:
@@ -219,7 +218,7 @@ async def _process_notifications_for_interval(days: int) -> dict:
 
         # Send notifications
         email_sent = await _send_email_notification(
-            admin_emails, registration, days_remaining
+            email_sender, admin_emails, registration, days_remaining
         )
         telegram_sent = await _send_telegram_notification(
             registration, days_remaining
@@ -283,9 +282,16 @@ def check_expiring_trademarks() -> dict:
     intervals = getattr(settings, 'notification_intervals_days', [180, 90, 30])
 
     async def process_all():
+        # Один отправитель на весь прогон: SMTP-соединение переиспользуется
+        email_sender = EmailSender()
         results = {}
-        for days in intervals:
-            results[f"{days}_days"] = await _process_notifications_for_interval(days)
+        try:
+            for days in intervals:
+                results[f"{days}_days"] = await _process_notifications_for_interval(
+                    days, email_sender
+                )
+        finally:
+            await email_sender.aclose()
         return results
 
     return _run_async(process_all())
@@ -327,14 +333,17 @@ def send_status_change_notification(
 
         # Send email
         if admin_emails:
-            email_sent = email_sender.send_status_change_notification(
-                to_emails=admin_emails,
-                trademark_name=trademark_name,
-                territory=territory,
-                registration_number=registration_number,
-                old_status=old_status,
-                new_status=new_status,
-            )
+            try:
+                email_sent = await email_sender.send_status_change_notification(
+                    to_emails=admin_emails,
+                    trademark_name=trademark_name,
+                    territory=territory,
+                    registration_number=registration_number,
+                    old_status=old_status,
+                    new_status=new_status,
+                )
+            finally:
+                await email_sender.aclose()
 
         # Send Telegram
         try:
@@ -384,9 +393,13 @@ def send_notification(registration_id: str, notification_type: str) -> dict:
             # Calculate days remaining
             days_remaining = (registration.expiration_date - date.today()).days
 
-            email_sent = await _send_email_notification(
-                admin_emails, registration, days_remaining
-            )
+            email_sender = EmailSender()
+            try:
+                email_sent = await _send_email_notification(
+                    email_sender, admin_emails, registration, days_remaining
+                )
+            finally:
+                await email_sender.aclose()
             telegram_sent = await _send_telegram_notification(
                 registration, days_remaining
             )
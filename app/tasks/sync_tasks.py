@@ -2,8 +2,9 @@
 
 import asyncio
 import logging
+from contextlib import nullcontext
 from datetime import date, datetime, timedelta, timezone
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 
 from celery import shared_task
@@ -14,6 +15,9 @@ from app.database import async_session_maker
 from app.models import TrademarkRegistration, SyncLog, Trademark, TrademarkClass
 from app.models.trademark import RenewalStatus, RegistrationStatus
 
+if TYPE_CHECKING:
+    from app.integrations.fips import FIPSScraper
+
 logger = logging.getLogger(__name__)
 
 
@@ -242,9 +246,15 @@ def _map_wipo_status(wipo_status: str) -> Optional[str]:
     return status_map.get(wipo_status.lower())
 
 
-async def _sync_fips_registration(registration: TrademarkRegistration) -> dict:
+async def _sync_fips_registration(
+    registration: TrademarkRegistration,
+    scraper: Optional['FIPSScraper'] = None,
+) -> dict:
     """
     Sync a single registration with FIPS.
+
+    Pass a shared scraper when syncing many registrations: its HTTP session
+    and rate limit then cover the whole batch.
     """
     from app.integrations.fips import FIPSScraper
     from app.integrations.storage import MinIOStorage
@@ -265,9 +275,11 @@ async def _sync_fips_registration(registration: TrademarkRegistration) -> dict:
         return result
 
     try:
-        async with FIPSScraper() as scraper:
+        async with (nullcontext(scraper) if scraper else FIPSScraper()) as scraper:
             # Fetch data from FIPS
             fips_data = await scraper.get_trademark_by_number(reg_number)
+            # Ожидание свободного слота общего скрапера в длительность не входит
+            start_time = fips_data.started_at or start_time
 
             if fips_data.error:
                 result["message"] = fips_data.error
@@ -468,24 +480,32 @@ def sync_fips_trademarks(limit: int = 50) -> dict:
             "skipped": 0,
         }
 
-        for registration in registrations:
-            try:
-                result = await _sync_fips_registration(registration)
+        # Один скрейпер на пакет: запросы идут параллельно (до
+        # FIPSScraper.MAX_CONCURRENCY), общий лимит частоты соблюдается
+        from app.integrations.fips import FIPSScraper
 
-                if result["status"] == "updated":
-                    results["updated"] += 1
-                elif result["status"] == "unchanged":
-                    results["unchanged"] += 1
-                elif result["status"] == "error":
-                    results["errors"] += 1
-                else:
-                    results["skipped"] += 1
+        async with FIPSScraper() as scraper:
+            outcomes = await asyncio.gather(
+                *(_sync_fips_registration(registration, scraper) for registration in registrations),
+                return_exceptions=True,
+            )
 
-                results["synced"] += 1
+        for registration, result in zip(registrations, outcomes):
+            if isinstance(result, Exception):
+                logger.error(f"Error syncing registration {registration.id}: {result}")
+                results["errors"] += 1
+                continue
 
-            except Exception as e:
-                logger.exception(f"Error syncing registration {registration.id}: {e}")
+            if result["status"] == "updated":
+                results["updated"] += 1
+            elif result["status"] == "unchanged":
+                results["unchanged"] += 1
+            elif result["status"] == "error":
                 results["errors"] += 1
+            else:
+                results["skipped"] += 1
+
+            results["synced"] += 1
 
         logger.info(f"FIPS sync completed: {results}")
         return results
@@ -674,14 +694,20 @@ def sync_priority_registrations() -> dict:
             results["wipo"]["total"] = len(wipo_regs)
 
         # Sync FIPS registrations
-        for reg in fips_regs:
-            try:
-                sync_result = await _sync_fips_registration(reg)
-                if sync_result["status"] == "updated":
-                    results["fips"]["updated"] += 1
-            except Exception as e:
-                logger.error(f"Priority FIPS sync error for {reg.id}: {e}")
+        from app.integrations.fips import FIPSScraper
+
+        async with FIPSScraper() as scraper:
+            outcomes = await asyncio.gather(
+                *(_sync_fips_registration(reg, scraper) for reg in fips_regs),
+                return_exceptions=True,
+            )
+
+        for reg, sync_result in zip(fips_regs, outcomes):
+            if isinstance(sync_result, Exception):
+                logger.error(f"Priority FIPS sync error for {reg.id}: {sync_result}")
                 results["fips"]["errors"] += 1
+            elif sync_result["status"] == "updated":
+                results["fips"]["updated"] += 1
 
         # Sync WIPO registrations
         for reg in wipo_regs:
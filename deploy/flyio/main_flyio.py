@@ -10,6 +10,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from app.config import settings
+from app.core.http import create_egrul_client
 from app.database import init_db, Base, engine
 
 # Use simplified API router (without sync that requires Celery)
@@ -81,9 +82,10 @@ async def lifespan(app: FastAPI):
     # Initialize default data
     await init_default_data()
 
+    app.state.egrul_client = create_egrul_client()
     yield
     # Shutdown
-    pass
+    await app.state.egrul_client.aclose()
 
 
 app = FastAPI(
@@ -10,6 +10,7 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
 from app.config import settings
+from app.core.http import create_egrul_client
 from app.database import init_db, Base, engine
 
 # Import individual routers (not the combined one that includes sync)
@@ -83,7 +84,10 @@ async def lifespan(app: FastAPI):
     # Initialize default data
     await init_default_data()
 
+    app.state.egrul_client = create_egrul_client()
     yield
+    # Shutdown
+    await app.state.egrul_client.aclose()
 
 
 app = FastAPI(
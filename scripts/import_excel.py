@@ -12,19 +12,20 @@ the PostgreSQL database, creating all necessary related records.
 import asyncio
 import re
 import sys
-import unicodedata
 from datetime import date, datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.core.text import normalize_text
 from app.database import async_session_maker, init_db
 from app.models import (
     RightsHolder,
@@ -34,18 +35,9 @@ from app.models import (
     TrademarkRegistration,
 )
 from app.models.trademark import RegistrationStatus, RenewalStatus
+from app.services.import_status import match_status
 
-
-def normalize_text(text: str) -> str:
-    """Normalize text for comparison (lowercase, remove extra spaces, NFKC)."""
-    if not text:
-        return ""
-    # Normalize unicode
-    text = unicodedata.normalize("NFKC", str(text))
-    # Remove non-breaking spaces and other special whitespace
-    text = re.sub(r"\s+", " ", text)
-    # Strip and lowercase
-    return text.strip().lower()
+_DIGITS_RE = re.compile(r"\d+")
 
 
 def parse_date(value) -> Optional[date]:
@@ -77,7 +69,7 @@ def parse_classes(value) -> List[int]:
     text = str(value)
     # Extract all numbers
     classes = []
-    for match in re.findall(r"\d+", text):
+    for match in _DIGITS_RE.findall(text):
         class_num = int(match)
         if 1 <= class_num <= 45:
             classes.append(class_num)
@@ -85,38 +77,34 @@ def parse_classes(value) -> List[int]:
     return sorted(set(classes))
 
 
+# Строк между flush'ами сессии
+IMPORT_BATCH_SIZE = 1000
+
+# Поле -> варианты заголовков Excel в порядке приоритета
+FIELD_ALIASES: Dict[str, List[str]] = {
+    "tm_name": ["Товарный знак (наименование)", "Товарный знак", "Наименование", "Name", "Trademark"],
+    "territory": ["Территория/страна", "Территория", "Country", "Territory"],
+    "classes": ["Классы \nМКТУ", "Классы МКТУ", "МКТУ", "Classes", "ICGS"],
+    "holder": ["Правообладатель", "Owner", "Rights Holder"],
+    "filing_date": ["Дата подачи", "Filing Date"],
+    "priority_date": ["Дата Приоритета", "Дата приоритета", "Priority Date"],
+    "expiration_date": ["Cрок действия", "Срок действия", "Expiration Date", "Valid Until"],
+    "application_number": ["Номер заявки на регистрацию", "Номер заявки", "Application Number"],
+    # Note: leading space in the original column name
+    "registration_number": [" Registration Number", "Registration Number", "Номер регистрации"],
+    "status": ["Результат", "Status", "Статус"],
+    "is_national": ["Национальная заявка", "National"],
+    "is_international": ["Международная заявка", "International"],
+    "comments": ["комментарии", "Комментарии", "Comments", "Notes"],
+}
+
+
 def map_status(value: str) -> str:
     """Map Excel status values to enum values."""
     if pd.isna(value) or not value:
         return RegistrationStatus.PENDING.value
 
-    status_lower = normalize_text(value)
-
-    mapping = {
-        "регистрация": RegistrationStatus.REGISTERED.value,
-        "регисрация": RegistrationStatus.REGISTERED.value,  # typo in data
-        "registration": RegistrationStatus.REGISTERED.value,
-        "отказ": RegistrationStatus.REJECTED.value,
-        "rejection": RegistrationStatus.REJECTED.value,
-        "refused": RegistrationStatus.REJECTED.value,
-        "частичная регистрация": RegistrationStatus.PARTIAL_REGISTRATION.value,
-        "partial": RegistrationStatus.PARTIAL_REGISTRATION.value,
-        "действие прекращено": RegistrationStatus.TERMINATED.value,
-        "terminated": RegistrationStatus.TERMINATED.value,
-        "делопроизводство": RegistrationStatus.PENDING.value,
-        "pending": RegistrationStatus.PENDING.value,
-        "экспертиза": RegistrationStatus.PENDING.value,
-        "examination": RegistrationStatus.PENDING.value,
-        "период оппозиции": RegistrationStatus.OPPOSITION.value,
-        "opposition": RegistrationStatus.OPPOSITION.value,
-        "решение о регистрации": RegistrationStatus.DECISION_PENDING.value,
-    }
-
-    for key, mapped_status in mapping.items():
-        if key in status_lower:
-            return mapped_status
-
-    return RegistrationStatus.PENDING.value
+    return match_status(normalize_text(value))
 
 
 def is_yes(value) -> bool:
@@ -134,6 +122,8 @@ class TrademarkImporter:
         self.territories_cache: Dict[str, Territory] = {}
         self.rights_holders_cache: Dict[str, RightsHolder] = {}
         self.trademarks_cache: Dict[str, Trademark] = {}
+        # Поле -> позиция колонки в кортеже строки; считается один раз на файл
+        self._cols: Dict[str, Optional[int]] = {}
         self.stats = {
             "territories_created": 0,
             "rights_holders_created": 0,
@@ -153,7 +143,7 @@ class TrademarkImporter:
         # Check database
         result = await self.session.execute(
             select(Territory).where(
-                Territory.name_en.ilike(f"%{name}%")
+                Territory.name_normalized == name_normalized
             )
         )
         territory = result.scalar_one_or_none()
@@ -211,21 +201,19 @@ class TrademarkImporter:
         if name_normalized in self.rights_holders_cache:
             return self.rights_holders_cache[name_normalized]
 
-        # Check database
-        result = await self.session.execute(
-            select(RightsHolder).where(
-                RightsHolder.name_normalized == name_normalized
-            )
+        # One atomic round-trip: inserts if missing, returns the row either way
+        stmt = pg_insert(RightsHolder).values(
+            name=name.strip(),
+            name_normalized=name_normalized,
         )
-        holder = result.scalar_one_or_none()
-
-        if not holder:
-            holder = RightsHolder(
-                name=name.strip(),
-                name_normalized=name_normalized,
-            )
-            self.session.add(holder)
-            await self.session.flush()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RightsHolder.name_normalized],
+            set_={"name_normalized": stmt.excluded.name_normalized},
+        ).returning(RightsHolder, literal_column("xmax = 0").label("inserted"))
+        row = (await self.session.execute(stmt)).one()
+        holder = row[0]
+
+        if row.inserted:
             self.stats["rights_holders_created"] += 1
 
         self.rights_holders_cache[name_normalized] = holder
@@ -245,13 +233,13 @@ class TrademarkImporter:
         if cache_key in self.trademarks_cache:
             return self.trademarks_cache[cache_key]
 
-        # Create new trademark
+        # Create new trademark; id is assigned here, so no flush is needed for it
         trademark = Trademark(
+            id=uuid4(),
             name=name.strip(),
             rights_holder_id=rights_holder.id if rights_holder else None,
         )
         self.session.add(trademark)
-        await self.session.flush()
         self.stats["trademarks_created"] += 1
 
         # Add classes
@@ -266,45 +254,60 @@ class TrademarkImporter:
         self.trademarks_cache[cache_key] = trademark
         return trademark
 
-    async def import_row(self, row: pd.Series) -> bool:
+    def _resolve_columns(self, columns: pd.Index) -> None:
+        """Map each field to the position of its first present alias column."""
+        positions = {col: i for i, col in enumerate(columns)}
+        self._cols = {
+            field: next((positions[c] for c in aliases if c in positions), None)
+            for field, aliases in FIELD_ALIASES.items()
+        }
+
+    def _get(self, row: Tuple, field: str):
+        """Cell value of a field, or None if the sheet has no such column."""
+        idx = self._cols[field]
+        return row[idx] if idx is not None else None
+
+    async def import_row(self, row: Tuple) -> bool:
         """Import single row from Excel."""
         try:
             # Parse basic data
-            tm_name = str(row.get("Товарный знак (наименование)", "")).strip()
+            tm_name = self._get(row, "tm_name")
+            tm_name = "" if pd.isna(tm_name) else str(tm_name).strip()
             if not tm_name:
                 return False
 
-            territory_name = str(row.get("Территория/страна", "Russia")).strip()
-            classes = parse_classes(row.get("Классы \nМКТУ", ""))
-            holder_name = row.get("Правообладатель")
+            territory_name = self._get(row, "territory")
+            territory_name = "Russia" if pd.isna(territory_name) else str(territory_name).strip()
+            classes = parse_classes(self._get(row, "classes"))
+            holder_name = self._get(row, "holder")
 
             # Dates
-            filing_date = parse_date(row.get("Дата подачи"))
-            priority_date = parse_date(row.get("Дата Приоритета"))
-            expiration_date = parse_date(row.get("Cрок действия"))
+            filing_date = parse_date(self._get(row, "filing_date"))
+            priority_date = parse_date(self._get(row, "priority_date"))
+            expiration_date = parse_date(self._get(row, "expiration_date"))
 
             # Numbers
-            application_number = row.get("Номер заявки на регистрацию")
+            application_number = self._get(row, "application_number")
             if pd.isna(application_number):
                 application_number = None
             else:
                 application_number = str(application_number).strip()
 
-            registration_number = row.get(" Registration Number")  # Note: leading space in column name
+            registration_number = self._get(row, "registration_number")
             if pd.isna(registration_number) or registration_number == "нет":
                 registration_number = None
             else:
                 registration_number = str(registration_number).strip()
 
             # Status
-            status = map_status(row.get("Результат", ""))
+            status = map_status(self._get(row, "status"))
 
             # Type flags
-            is_national = is_yes(row.get("Национальная заявка"))
-            is_international = is_yes(row.get("Международная заявка"))
+            is_national = is_yes(self._get(row, "is_national"))
+            is_international = is_yes(self._get(row, "is_international"))
 
             # Comments
-            comments = row.get("комментарии")
+            comments = self._get(row, "comments")
             if pd.isna(comments):
                 comments = None
 
@@ -354,14 +357,16 @@ class TrademarkImporter:
 
         print(f"Found {len(df)} rows")
 
-        for idx, row in df.iterrows():
-            if await self.import_row(row):
-                if (idx + 1) % 100 == 0:
+        self._resolve_columns(df.columns)
+
+        # One transaction for the whole file; the unit of work is flushed per batch
+        async with self.session.begin():
+            for idx, row in enumerate(df.itertuples(index=False, name=None)):
+                await self.import_row(row)
+                if (idx + 1) % IMPORT_BATCH_SIZE == 0:
                     print(f"Processed {idx + 1} rows...")
                     await self.session.flush()
 
-        await self.session.commit()
-
         print("\n=== Import Statistics ===")
         for key, value in self.stats.items():
             print(f"{key}: {value}")